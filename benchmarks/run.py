@@ -0,0 +1,177 @@
+import argparse
+import dataclasses
+import itertools
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+# Make the shared npcgen package importable when run from this folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from npcgen.garou import WerewolfEngine, WerewolfParams
+from npcgen.hunter import HunterEngine, HunterParams
+from npcgen.vampire import VampireEngine, VampireParams
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+# Characters per generate_many call in the "batch" stage
+BATCH_SIZE = 1000
+# Characters generated up front for the "format" stage to cycle through
+FORMAT_SAMPLES = 64
+
+
+def stub_name(culture, rng=random):
+    # Keeps the network and the name corpus out of the numbers
+    return "Stub Name"
+
+
+def common_stages(fields):
+    return {
+        "attributes": lambda e, p, rng: e.generate_attributes(p.skill_focus, p.importance, rng=rng),
+        "skills": lambda e, p, rng: e.generate_skills(p.skill_focus, p.importance, rng=rng),
+        **fields,
+        "generate": lambda e, p, rng: e.generate(p, rng=rng),
+        # (setup, stage): setup runs untimed and its result is passed on
+        "format": (lambda e, p: itertools.cycle([e.generate(p, rng=random.Random(i)) for i in range(FORMAT_SAMPLES)]),
+                   lambda e, p, characters, rng: e.format_character(next(characters))),
+        "batch": lambda e, p, rng: e.generate_many(BATCH_SIZE, p, seed=rng.getrandbits(64)),
+    }
+
+
+# Splat -> (engine class, representative inputs, stage -> callable or
+# (setup, callable))
+SUITES = {
+    "vampire": (VampireEngine, VampireParams(clan="Tremere", sect="Camarilla", diablerist=True), common_stages({
+        "disciplines": lambda e, p, rng: e.generate_disciplines(p.clan, p.diablerist, p.importance, rng=rng),
+        "advantages": lambda e, p, rng: e.generate_advantages(p.sect, p.importance, rng=rng),
+        "flaws": lambda e, p, rng: e.generate_flaws(p.importance, rng=rng),
+    })),
+    "werewolf": (WerewolfEngine, WerewolfParams(auspice="Theurge", tribe="Black Furies", breed="Homid"), common_stages({
+        "gifts": lambda e, p, rng: e.generate_gifts(p.auspice, p.tribe, p.breed, p.importance, rng=rng),
+        "merits_and_flaws": lambda e, p, rng: e.generate_merits_and_flaws(p.importance, rng=rng),
+        "backgrounds": lambda e, p, rng: e.generate_backgrounds(p.importance, rng=rng),
+        "talismans": lambda e, p, rng: e.generate_talismans(p.importance, rng=rng),
+        "caern": lambda e, p, rng: e.generate_caern(p.importance, rng=rng),
+    })),
+    "hunter": (HunterEngine, HunterParams(creed="Entrepreneurial", drive="Curiosity"), common_stages({
+        "edges_and_perks": lambda e, p, rng: e.generate_edges_and_perks(p.creed, p.importance, rng=rng),
+        "merits_and_flaws": lambda e, p, rng: e.generate_merits_and_flaws(p.importance, rng=rng),
+        "backgrounds": lambda e, p, rng: e.generate_backgrounds(p.importance, rng=rng),
+    })),
+}
+
+
+def measure(func, min_time, repeats):
+    # Characters per second: the median of several timed rounds, each long
+    # enough to swamp timer resolution
+    rng = random.Random(0)
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            func(rng)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / repeats:
+            break
+        calls *= 2
+    rounds = [elapsed / calls]
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func(rng)
+        rounds.append((time.perf_counter() - start) / calls)
+    seconds = statistics.median(rounds)
+
+    # Allocations: bytes each call's result keeps alive, and the peak
+    # reached while a single call runs
+    n = min(calls, 64)
+    tracemalloc.start()
+    base_size, _ = tracemalloc.get_traced_memory()
+    func(rng)
+    _, peak = tracemalloc.get_traced_memory()
+    results = [func(rng) for _ in range(n)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+    return {
+        "seconds": seconds,
+        "bytes": (size - base_size) / n,
+        "peak_bytes": peak - base_size,
+    }
+
+
+def run(splats, stages, min_time, repeats, data_dirs):
+    results = {}
+    for splat in splats:
+        engine_class, params, suite = SUITES[splat]
+        engine = engine_class(data_dir=data_dirs.get(splat), name_provider=stub_name)
+        for importance in engine.attribute_points:
+            tier_params = dataclasses.replace(params, importance=importance)
+            for stage, func in suite.items():
+                if stages and stage not in stages:
+                    continue
+                if isinstance(func, tuple):
+                    setup, stage_func = func
+                    state = setup(engine, tier_params)
+                    call = lambda rng: stage_func(engine, tier_params, state, rng)
+                else:
+                    call = lambda rng: func(engine, tier_params, rng)
+                result = measure(call, min_time, repeats)
+                characters = BATCH_SIZE if stage == "batch" else 1
+                result["chars_per_sec"] = characters / result["seconds"]
+                results[f"{splat}/{importance}/{stage}"] = result
+                print(f"{splat:<9} {importance:<10} {stage:<17} {result['chars_per_sec']:>12,.0f}/s "
+                      f"{result['seconds'] * 1e6:>10.1f} us {result['bytes'] / 1024:>8.1f} KiB kept "
+                      f"{result['peak_bytes'] / 1024:>9.1f} KiB peak", flush=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    # Slower than the baseline by more than threshold counts as a regression
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        ratio = baseline[key]["chars_per_sec"] / result["chars_per_sec"]
+        if ratio > 1 + threshold:
+            regressions.append((key, ratio))
+    for key, ratio in sorted(regressions, key=lambda item: -item[1]):
+        print(f"REGRESSION {key}: {ratio:.2f}x slower than baseline")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every generation stage for each importance tier.")
+    parser.add_argument("--splat", action="append", choices=SUITES, help="limit to a character type (repeatable)")
+    parser.add_argument("--stage", action="append", help="limit to a stage, e.g. skills or generate (repeatable)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds spent timing each benchmark")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--data-dir", action="append", default=[], metavar="SPLAT=DIR",
+                        help="run against a fixture ruleset instead of the bundled JSON")
+    parser.add_argument("--save", metavar="NAME", help="store the results as baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare against baselines/NAME.json")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before failing, 0.2 = 20%%")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)
+    data_dirs = dict(item.split("=", 1) for item in args.data_dir)
+    results = run(args.splat or list(SUITES), args.stage, args.min_time, args.repeats, data_dirs)
+
+    if args.save:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(os.path.join(BASELINE_DIR, f"{args.save}.json"), "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, f"{args.compare}.json"), encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
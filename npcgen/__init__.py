@@ -0,0 +1,12 @@
+from npcgen.engine import CharacterEngine
+from npcgen.garou import WerewolfEngine, WerewolfParams
+from npcgen.hunter import HunterEngine, HunterParams
+from npcgen.jobs import Cancelled, DeadlineExceeded, JobExecutor
+from npcgen.metrics import Metrics
+from npcgen.nameclient import NameClient
+from npcgen.namecache import NamePool
+from npcgen.offlinenames import OfflineNames
+from npcgen.parallel import generate_parallel, iter_parallel
+from npcgen.record import CharacterRecord
+from npcgen.splats import SPLATS, Cast
+from npcgen.vampire import VampireEngine, VampireParams
@@ -0,0 +1,67 @@
+import logging
+import random
+from itertools import accumulate
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAX_DOTS = 5
+
+
+def trait_weights(traits, categories, focuses):
+    # Picking a focused category twice as often and then a trait uniformly
+    # inside it is the same as giving every trait weight / category size.
+    # Traits outside every category never receive points.
+    weights = dict.fromkeys(traits, 0.0)
+    for category, members in categories.items():
+        weight = 2 if category in focuses else 1
+        for trait in members:
+            weights[trait] = weight / len(members)
+    return [weights[t] for t in traits]
+
+
+def allocate_points(dots, weights, points, cap=MAX_DOTS, rng=random):
+    # Spend points one dot at a time. Capped traits drop out of the draw
+    # instead of being rejected and redrawn, so every draw lands and the
+    # loop runs at most points times.
+    weights = [w if d < cap else 0 for d, w in zip(dots, weights)]
+    indexes = range(len(dots))
+    cum_weights = list(accumulate(weights))
+    while points > 0 and cum_weights[-1] > 0:
+        i = rng.choices(indexes, cum_weights=cum_weights)[0]
+        dots[i] += 1
+        points -= 1
+        if dots[i] >= cap:
+            # Only rebuild the running totals when a trait drops out
+            weights[i] = 0
+            cum_weights = list(accumulate(weights))
+    if points > 0:
+        logger.warning(f"Point budget exceeds what the traits can hold; {points} points left unspent")
+    return dots
+
+
+def allocate_batch(base, weights, points, n, cap=MAX_DOTS, rng=None):
+    # Same draw as allocate_points for n characters at once, one column of
+    # dots per step. Returns an (n, traits) int8 matrix.
+    rng = rng or np.random.default_rng()
+    weights = np.asarray(weights, dtype=np.float64)
+    dots = np.tile(np.asarray(base, dtype=np.int8), (n, 1))
+    remaining = np.broadcast_to(np.asarray(points, dtype=np.int64), (n,)).copy()
+    rows = np.arange(n)
+    while True:
+        live = np.where(dots < cap, weights, 0.0)
+        cumulative = np.cumsum(live, axis=1)
+        totals = cumulative[:, -1]
+        active = (remaining > 0) & (totals > 0)
+        if not active.any():
+            break
+        draws = rng.random(n) * totals
+        picks = (cumulative <= draws[:, None]).sum(axis=1)
+        picks = np.minimum(picks, dots.shape[1] - 1)
+        dots[rows[active], picks[active]] += 1
+        remaining -= active
+    if remaining.any():
+        logger.warning(f"Point budget exceeds what the traits can hold; {int(remaining.sum())} points "
+                       f"left unspent across {int(np.count_nonzero(remaining))} characters")
+    return dots
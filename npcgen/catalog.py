@@ -0,0 +1,222 @@
+import random
+from itertools import permutations
+
+import numpy as np
+
+
+class CostTable:
+    # Flat, read-only list of advantages or flaws, built once per ruleset
+    def __init__(self, items):
+        self.items = tuple(items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def sample(self, k, rng=random):
+        return rng.sample(self.items, min(len(self.items), k))
+
+
+class AdvantageCatalog:
+    # Index over a Merits/Backgrounds/Talismans section: every advantage and
+    # flaw flattened once (the last entry wins on duplicate names, as before),
+    # plus each group's own advantages for per-group picks
+    def __init__(self, section):
+        advantages = {}
+        flaws = {}
+        for data in section.values():
+            for adv in data.get("advantages", []):
+                advantages[adv["name"]] = adv
+            for fl in data.get("flaws", []):
+                flaws[fl["name"]] = fl
+        self.advantages = CostTable(advantages.values())
+        self.flaws = CostTable(flaws.values())
+        # Advantages by name without stray whitespace ("Ally: " -> "Ally:")
+        self.by_name = {name.strip(): adv for name, adv in advantages.items()}
+
+        self.group_names = tuple(section)
+        self.group_advantages = tuple(tuple(data.get("advantages", [])) for data in section.values())
+
+    def pick_per_group(self, count, rng=random, exclude=()):
+        # Pick a group uniformly, then one of its advantages not named in
+        # exclude (names as in by_name); groups without any use up the pick
+        picks = []
+        for _ in range(count):
+            advantages = self.group_advantages[rng.randrange(len(self.group_advantages))]
+            if exclude:
+                advantages = [adv for adv in advantages if adv["name"].strip() not in exclude]
+            if advantages:
+                picks.append(rng.choice(advantages))
+        return picks
+
+
+def sample_distinct(pool, size, k, rng=random, exclude=()):
+    # Up to k distinct items of pool[:size] that are not in exclude, by a
+    # partial Fisher-Yates shuffle. Swaps are kept in a dict rather than
+    # made on a copy of the pool, so a draw costs O(k + len(exclude))
+    # however large the pool is.
+    swaps = {}
+    picked = []
+    i = 0
+    while len(picked) < k and i < size:
+        j = rng.randrange(i, size)
+        item = pool[swaps.get(j, j)]
+        swaps[j] = swaps.get(i, i)
+        i += 1
+        if item not in exclude:
+            picked.append(item)
+    return picked
+
+
+class GiftCatalog:
+    # Gifts from a category -> group -> per-rank lists section (Breed,
+    # Auspice and Tribe), each gift stored once under an integer ID. The
+    # inverted index maps every (category, group) to its gift IDs sorted by
+    # rank, so the gifts up to a rank are a prefix of it.
+    def __init__(self, section):
+        self.names = []
+        self.ids = {}
+        # Gift ID -> the lowest rank any group lists it at
+        self.lowest_rank = []
+        self.index = {}
+        # (category, group) -> ends[rank], the length of the prefix up to rank
+        self.rank_ends = {}
+        for category, groups in section.items():
+            for group, ranks in groups.items():
+                pool = []
+                ends = [0]
+                for rank, gifts in enumerate(ranks, 1):
+                    for name in gifts:
+                        if name not in self.ids:
+                            self.ids[name] = len(self.names)
+                            self.names.append(name)
+                            self.lowest_rank.append(rank)
+                        gift = self.ids[name]
+                        self.lowest_rank[gift] = min(rank, self.lowest_rank[gift])
+                        if gift not in pool:
+                            pool.append(gift)
+                    ends.append(len(pool))
+                self.index[category, group] = tuple(pool)
+                self.rank_ends[category, group] = tuple(ends)
+            # A category's own entry, for characters without a group in it
+            self._add_union((category, None), [(category, group) for group in groups])
+        self.groups = {category: tuple(groups) for category, groups in section.items()}
+
+    def _add_union(self, key, members):
+        # Index entry holding the gifts of every member, each at its lowest rank
+        depth = max((len(self.rank_ends[member]) for member in members), default=1)
+        pool = []
+        ends = [0]
+        for rank in range(1, depth):
+            for member in members:
+                member_ends = self.rank_ends[member]
+                if rank < len(member_ends):
+                    gifts = self.index[member][member_ends[rank - 1]:member_ends[rank]]
+                    pool.extend(gift for gift in gifts if gift not in pool)
+            ends.append(len(pool))
+        # rank_ends first, since other threads look for key in index
+        self.rank_ends[key] = tuple(ends)
+        self.index[key] = tuple(pool)
+
+    def key(self, category, group):
+        # Index key for a group; unset or unknown groups stand for the whole category
+        return (category, group) if (category, group) in self.index else (category, None)
+
+    def union(self, keys):
+        # Index key for the gifts of several keys together, e.g. everything a
+        # werewolf's breed, auspice and tribe open up; built on first use
+        keys = tuple(keys)
+        if keys not in self.index:
+            self._add_union(keys, keys)
+        return keys
+
+    def sample(self, key, rank, k, rng=random, exclude=()):
+        # Up to k distinct gift IDs of key at or below rank, skipping exclude
+        ends = self.rank_ends[key]
+        return sample_distinct(self.index[key], ends[max(0, min(rank, len(ends) - 1))], k, rng, exclude)
+
+
+class EdgeCatalog:
+    # Hunter edges and perks under integer IDs: every edge of every group
+    # (Assets, Aptitudes, Endowments), each creed's edge IDs and each
+    # edge's perk IDs. Every ordered pair of each edge's perks is listed
+    # once here as perk IDs; each sampled edge becomes a fresh entry of its
+    # own that shares only the name and description strings.
+    def __init__(self, groups, creeds, perks_per_edge=2):
+        edges = {name: edge for group in groups.values() for name, edge in group.get("edges", {}).items()}
+        self.edge_names = tuple(edges)
+        self.edge_ids = {name: i for i, name in enumerate(self.edge_names)}
+        self.descriptions = tuple(edge.get("desc", "") for edge in edges.values())
+        self.perks = tuple(perk for edge in edges.values() for perk in edge.get("perks", []))
+        self.edge_perks = []
+        start = 0
+        for edge in edges.values():
+            count = len(edge.get("perks", []))
+            self.edge_perks.append(tuple(range(start, start + count)))
+            start += count
+        self.edge_perks = tuple(self.edge_perks)
+
+        # Creed -> its edge IDs; unknown creeds and creeds without edges
+        # draw from every edge
+        self.all_edges = tuple(range(len(self.edge_names)))
+        self.creed_edges = {}
+        for creed in creeds:
+            ids = tuple(self.edge_ids[name] for name in creed.get("edges", []) if name in self.edge_ids)
+            if ids:
+                self.creed_edges[creed["name"]] = ids
+
+        # Edge ID -> every ordered choice of its perks, as perk ID tuples
+        self.choices = tuple(
+            tuple(permutations(perk_ids, min(len(perk_ids), perks_per_edge)))
+            for perk_ids in self.edge_perks
+        )
+
+        # The same tables as arrays for sample_many
+        self.choice_counts = np.array([len(choices) for choices in self.choices], dtype=np.int64)
+        self.creed_arrays = {creed: np.array(ids, dtype=np.int64) for creed, ids in self.creed_edges.items()}
+        self.all_edges_array = np.array(self.all_edges, dtype=np.int64)
+
+    def entry(self, edge, chosen):
+        # A character's entry for an edge and its chosen perk IDs; built
+        # fresh so editing one sheet never touches another
+        perks = self.perks
+        return {"Edge": self.edge_names[edge], "Description": self.descriptions[edge],
+                "Perks": [dict(perks[perk]) for perk in chosen]}
+
+    def edges_for(self, creed, excluded=()):
+        # Edge IDs a creed draws from, less any excluded by name; a creed
+        # whose edges are all excluded draws from every edge left
+        edges = self.creed_edges.get(creed, self.all_edges)
+        if excluded:
+            edges = (tuple(edge for edge in edges if self.edge_names[edge] not in excluded)
+                     or tuple(edge for edge in self.all_edges if self.edge_names[edge] not in excluded))
+        return edges
+
+    def sample(self, creed, count, rng=random, required=(), excluded=()):
+        # count edges, each with a uniform ordered choice of its perks:
+        # the required edges, then draws with replacement from the creed's
+        entries = []
+        for name in required:
+            edge = self.edge_ids[name]
+            entries.append(self.entry(edge, rng.choice(self.choices[edge])))
+        edges = self.edges_for(creed, excluded)
+        for _ in range(count - len(entries)):
+            edge = rng.choice(edges)
+            entries.append(self.entry(edge, rng.choice(self.choices[edge])))
+        return entries
+
+    def sample_many(self, n, creed, count, rng=None, required=(), excluded=()):
+        # sample for n characters of one creed from a NumPy Generator: the
+        # edges and perk choices of the whole batch are two array draws
+        rng = rng or np.random.default_rng()
+        if excluded:
+            edges = np.array(self.edges_for(creed, excluded), dtype=np.int64)
+        else:
+            edges = self.creed_arrays.get(creed, self.all_edges_array)
+        drawn = edges[rng.integers(len(edges), size=(n, count - len(required)))]
+        if required:
+            fixed = np.array([self.edge_ids[name] for name in required], dtype=np.int64)
+            drawn = np.hstack((np.tile(fixed, (n, 1)), drawn))
+        picks = (rng.random((n, count)) * self.choice_counts[drawn]).astype(np.int64)
+        choices, entry = self.choices, self.entry
+        return [[entry(edge, choices[edge][pick]) for edge, pick in zip(edge_row, pick_row)]
+                for edge_row, pick_row in zip(drawn.tolist(), picks.tolist())]
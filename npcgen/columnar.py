@@ -0,0 +1,233 @@
+import json
+import zipfile
+
+import numpy as np
+
+# Column kinds. Traits, ints and bools hold one value per character. Text
+# and list elements are dictionary encoded: int32 codes into a dictionary
+# of distinct strings. Lists and maps hold a variable number of entries per
+# character, sliced by an offsets column.
+TRAITS = "traits"
+INT = "int"
+BOOL = "bool"
+TEXT = "text"
+LIST = "list"
+MAP = "map"
+STRUCT = "struct"
+
+MANIFEST = "manifest.json"
+
+# Rows per row group. Batches are buffered as columns until one is full,
+# so readers open a few large arrays rather than many small ones.
+ROW_GROUP_SIZE = 1 << 16
+
+# Stand-in for an entry that lacks a field of its map, e.g. a discipline
+# without a level
+MISSING = -1
+
+
+def kind_of(value):
+    if isinstance(value, bool):
+        return BOOL
+    if isinstance(value, int):
+        return INT
+    if isinstance(value, list):
+        return LIST
+    if isinstance(value, dict):
+        # Fixed sections such as Merits and Flaws or Caern are split into a
+        # column per key; name -> dots or name -> details sections are maps
+        if any(isinstance(item, (list, str)) for item in value.values()):
+            return STRUCT
+        return MAP
+    # Text, and anything else as its JSON
+    return TEXT
+
+
+def label(value):
+    # The dictionary entry for a list element: the text itself, or the first
+    # text field of a catalog entry (its name, edge, ...)
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        for item in value.values():
+            if isinstance(item, str):
+                return item
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def encode(strings):
+    # (codes, dictionary) for a sequence of strings, dictionary in first-seen order
+    codes = {}
+    array = np.fromiter((codes.setdefault(s, len(codes)) for s in strings), dtype=np.int32, count=len(strings))
+    return array, np.array(list(codes), dtype=str)
+
+
+def offsets(lengths):
+    return np.concatenate(([0], np.cumsum(lengths, dtype=np.int64)))
+
+
+class ColumnWriter:
+    # Streams characters into a zip of NumPy arrays. Batches are turned into
+    # columns as they arrive and written out a row group at a time, each
+    # with its own dictionaries, so memory is bounded by one row group of
+    # columns; read_columns merges the row groups back together.
+    def __init__(self, f, engine, row_group_size=ROW_GROUP_SIZE):
+        self.zip = zipfile.ZipFile(f, "w", compression=zipfile.ZIP_STORED, allowZip64=True)
+        self.traits = {"Attributes": tuple(engine.attribute_names), "Skills": tuple(engine.skill_names)}
+        self.row_group_size = row_group_size
+        # Column -> kind, fixed by the first character like the CSV header
+        self.schema = None
+        self.row_groups = []
+        # Column -> {batch index: array}, and the rows of each batch
+        self.pending = {}
+        self.pending_rows = []
+
+    def write(self, characters):
+        if self.schema is None:
+            self.schema = {}
+            self._plan("", characters[0])
+        batch = len(self.pending_rows)
+        for column, array in self._columns("", characters):
+            self.pending.setdefault(column, {})[batch] = array
+        self.pending_rows.append(len(characters))
+        if sum(self.pending_rows) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending_rows:
+            return
+        group = len(self.row_groups)
+        for column, array in merge_groups(self.pending, self.schema, len(self.pending_rows)).items():
+            with self.zip.open(f"{group:05d}/{column}.npy", "w", force_zip64=True) as member:
+                np.lib.format.write_array(member, np.ascontiguousarray(array), allow_pickle=False)
+        self.row_groups.append(sum(self.pending_rows))
+        self.pending = {}
+        self.pending_rows = []
+
+    def close(self):
+        self.flush()
+        self.zip.writestr(MANIFEST, json.dumps({"row_groups": self.row_groups, "schema": self.schema}))
+        self.zip.close()
+
+    def _plan(self, prefix, record):
+        for field, value in record.items():
+            column = prefix + field
+            if not prefix and field in self.traits:
+                self.schema[column] = TRAITS
+            else:
+                self.schema[column] = kind_of(value)
+                if self.schema[column] == STRUCT:
+                    self._plan(column + ".", value)
+
+    def _columns(self, prefix, records):
+        # (column, array) for every column under prefix
+        for column, kind in self.schema.items():
+            if not column.startswith(prefix) or "." in column[len(prefix):]:
+                continue
+            field = column[len(prefix):]
+            if kind == STRUCT:
+                yield from self._columns(column + ".", [record.get(field) or {} for record in records])
+                continue
+            values = [record.get(field) for record in records]
+            if kind == TRAITS:
+                for trait in self.traits[field]:
+                    yield f"{column}.{trait}", np.fromiter(((value or {}).get(trait, 0) for value in values),
+                                                           dtype=np.uint8, count=len(values))
+            elif kind == INT:
+                yield column, np.array([MISSING if value is None else value for value in values], dtype=np.int32)
+            elif kind == BOOL:
+                yield column, np.array([bool(value) for value in values], dtype=bool)
+            elif kind == TEXT:
+                codes, dictionary = encode([label("" if value is None else value) for value in values])
+                yield column, codes
+                yield f"{column}.dictionary", dictionary
+            elif kind == LIST:
+                values = [value or [] for value in values]
+                yield f"{column}.offsets", offsets([len(value) for value in values])
+                codes, dictionary = encode([label(item) for value in values for item in value])
+                yield column, codes
+                yield f"{column}.dictionary", dictionary
+            else:
+                yield from self._map(column, [value or {} for value in values])
+
+    @staticmethod
+    def _map(column, values):
+        # Keys as a dictionary encoded list; int values in .values, and the
+        # int fields of dict values (a discipline's level) in .<field>
+        yield f"{column}.offsets", offsets([len(value) for value in values])
+        codes, dictionary = encode([key for value in values for key in value])
+        yield column, codes
+        yield f"{column}.dictionary", dictionary
+        entries = [item for value in values for item in value.values()]
+        if any(isinstance(item, int) for item in entries):
+            yield f"{column}.values", np.array([item if isinstance(item, int) else MISSING for item in entries],
+                                               dtype=np.int32)
+        fields = {}
+        for item in entries:
+            if isinstance(item, dict):
+                fields.update((name, None) for name, sub in item.items() if isinstance(sub, int))
+        for name in fields:
+            yield f"{column}.{name}", np.array([item.get(name, MISSING) if isinstance(item, dict) else MISSING
+                                                for item in entries], dtype=np.int32)
+
+
+def read_columns(path, columns=None):
+    # Column -> NumPy array over every row group. Dictionary encoded columns
+    # come with a merged "<column>.dictionary"; decode them with
+    # dictionary[codes]. List and map entries of row i are
+    # codes[offsets[i]:offsets[i + 1]]. columns limits what is loaded to
+    # the named columns and their companions.
+    with zipfile.ZipFile(path) as archive:
+        manifest = json.loads(archive.read(MANIFEST))
+        wanted = None if columns is None else set(columns)
+        groups = {}
+        for name in archive.namelist():
+            if name == MANIFEST:
+                continue
+            group, _, member = name.partition("/")
+            column = member[:-len(".npy")]
+            if wanted is not None and column not in wanted and column.rpartition(".")[0] not in wanted:
+                continue
+            with archive.open(name) as f:
+                groups.setdefault(column, {})[int(group)] = np.lib.format.read_array(f, allow_pickle=False)
+    return merge_groups(groups, manifest["schema"], len(manifest["row_groups"]))
+
+
+def merge_groups(groups, schema, count):
+    # Column -> one array, from column -> {part index: array} over count
+    # parts, remapping codes onto one dictionary and rebasing offsets
+    merged = {}
+    for column, parts in groups.items():
+        if column.endswith(".dictionary"):
+            continue
+        base = column.rpartition(".")[0]
+        if column.endswith(".offsets"):
+            merged[column] = merge_offsets(parts, count)
+        elif column + ".dictionary" in groups:
+            merged[column], merged[column + ".dictionary"] = merge_codes(parts, groups[column + ".dictionary"])
+        elif base + ".offsets" in groups and column not in schema:
+            # A map's value column; parts without any entries left it out
+            lengths = {part: int(offsets[-1]) for part, offsets in groups[base + ".offsets"].items()}
+            merged[column] = np.concatenate([parts.get(part, np.full(n, MISSING, dtype=np.int32))
+                                             for part, n in sorted(lengths.items())])
+        else:
+            merged[column] = np.concatenate([parts[part] for part in sorted(parts)])
+    return merged
+
+
+def merge_offsets(parts, count):
+    merged = [np.zeros(1, dtype=np.int64)]
+    total = 0
+    for part in range(count):
+        offsets = parts[part]
+        merged.append(offsets[1:] + total)
+        total += int(offsets[-1])
+    return np.concatenate(merged)
+
+
+def merge_codes(parts, dictionaries):
+    # Remap each part's codes onto one sorted dictionary
+    dictionary = np.unique(np.concatenate([dictionaries[part] for part in sorted(dictionaries)]))
+    codes = [np.searchsorted(dictionary, dictionaries[part])[parts[part]].astype(np.int32) if len(parts[part])
+             else parts[part] for part in sorted(parts)]
+    return np.concatenate(codes), dictionary
@@ -0,0 +1,66 @@
+import re
+
+# What a constraint can name. Attributes and skills belong to every splat;
+# each engine adds its own in constraint_targets.
+ATTRIBUTE = "attribute"
+SKILL = "skill"
+DISCIPLINE = "discipline"
+ADVANTAGE = "advantage"
+FLAW = "flaw"
+GIFT = "gift"
+BACKGROUND = "background"
+EDGE = "edge"
+
+# "Stealth>=4" sets a minimum, a bare "Resources" asks for the trait at all
+# and "!Brawl" keeps it off the sheet
+SPEC = re.compile(r"\s*(!?)\s*(.*?)\s*(?:(?:>=|≥)\s*(\d+))?\s*$")
+
+
+class Constraints:
+    # Constraint specs compiled against one engine's ruleset: kind -> name
+    # -> minimum, and kind -> excluded names. Generators start from the
+    # minimums and never draw an excluded name, so nothing is rerolled.
+    def __init__(self, specs, minimums, excluded):
+        self.specs = specs
+        self._minimums = minimums
+        self._excluded = excluded
+        # What generators derive from the constraints, e.g. starting dots,
+        # kept so each character reuses it
+        self.derived = {}
+
+    def required(self, kind):
+        return self._minimums.get(kind, {})
+
+    def excluded(self, kind):
+        return self._excluded.get(kind, frozenset())
+
+
+def parse_constraints(specs, targets):
+    # specs: strings such as "Obfuscate>=3"; targets: name -> (kind, highest
+    # level). Raises ValueError for anything that can never be met whatever
+    # the character's other inputs.
+    minimums = {}
+    excluded = {}
+    for spec in specs:
+        negate, name, level = SPEC.match(spec).groups()
+        if not name:
+            raise ValueError(f"Empty constraint '{spec}'")
+        if name not in targets:
+            raise ValueError(f"Unknown trait '{name}' in constraint '{spec}'")
+        kind, highest = targets[name]
+        if negate:
+            if level is not None:
+                raise ValueError(f"Constraint '{spec}' both excludes {name} and sets a minimum for it")
+            excluded.setdefault(kind, set()).add(name)
+            continue
+        level = 1 if level is None else int(level)
+        if level > highest:
+            raise ValueError(f"{name} never goes above {highest}, so '{spec}' cannot be met")
+        if level > 0:
+            required = minimums.setdefault(kind, {})
+            required[name] = max(level, required.get(name, 0))
+
+    clashes = sorted(name for kind, names in excluded.items() for name in names if name in minimums.get(kind, {}))
+    if clashes:
+        raise ValueError(f"Constraints both require and exclude {', '.join(clashes)}")
+    return Constraints(tuple(specs), minimums, {kind: frozenset(names) for kind, names in excluded.items()})
@@ -0,0 +1,471 @@
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import random
+
+import numpy as np
+
+from npcgen import jobs, names, seedcode
+from npcgen.allocation import MAX_DOTS, allocate_batch, allocate_points, trait_weights
+from npcgen.constraints import ATTRIBUTE, SKILL, parse_constraints
+from npcgen.metrics import NO_STAGE
+from npcgen.record import RecordCodec
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Where the name cache and other generated files are kept between runs
+CACHE_DIR = os.environ.get("NPCGEN_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "npcgen"))
+
+ALL_FOCUSES = ("Physical", "Social", "Mental")
+
+# Categorize skills for skill focus weighting
+SKILL_CATEGORIES = {
+    "Physical": ["Athletics", "Brawl", "Drive", "Firearms", "Larceny", "Stealth", "Survival"],
+    "Social": ["Animal Ken", "Etiquette", "Insight", "Intimidation", "Leadership", "Performance", "Persuasion", "Streetwise", "Subterfuge"],
+    "Mental": ["Academics", "Awareness", "Finance", "Investigation", "Medicine", "Occult", "Politics", "Science", "Technology"]
+}
+
+# The JSON every splat shares, and the tables derived from it
+CORE_DATA = ("attributes_data", "skills_data")
+CORE_TABLES = CORE_DATA + ("attribute_categories", "attribute_names", "skill_names", "_weights")
+
+
+def importance_table(levels, values, default):
+    # Importance index -> value, with the default in the last slot so that
+    # index -1 (an importance outside levels) falls through to it
+    return tuple(values.get(level, default) for level in levels) + (default,)
+
+
+# Rerolls allowed per group member when enforcing a distinct section
+MAX_DISTINCT_REROLLS = 8
+
+# Compiled constraint sets an engine keeps before starting over
+MAX_CONSTRAINT_SETS = 256
+
+
+# Core fingerprint -> the one copy of CORE_TABLES used by every engine in
+# this process whose attribute and skill files match
+_cores = {}
+
+
+class CharacterEngine:
+    # Folder under the repository root holding this splat's JSON files
+    data_folder = None
+    # Splat name used in metrics labels, and its one-letter tag in seed codes
+    splat = None
+    seed_tag = None
+    # File name -> attribute the parsed JSON is stored on
+    data_files = {}
+    # Importance -> points to spend, and the fallback for unknown importances
+    attribute_points = {}
+    default_attribute_points = 15
+    skill_points = {}
+    default_skill_points = 25
+    # Every importance a splat knows; generation works on an importance's
+    # index into this tuple (see tier) rather than on its name
+    importance_levels = ()
+    # Table name -> (importance -> value, default), compiled for each
+    # subclass into a tuple indexed by tier
+    importance_values = {}
+    # Character section -> (stage, function(engine, params, tier, rng)),
+    # in generation order; what reroll can regenerate on its own
+    sections = {}
+    # Section -> function(section) giving the trait names in it, for the
+    # sections generate_group can keep distinct
+    distinct_sections = {}
+    # Params fields besides importance that check_constraints reads
+    constraint_fields = ()
+    # Params field -> values generate_group can deal out; set by build_tables
+    spread_options = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.importance_indexes = {level: i for i, level in enumerate(cls.importance_levels)}
+        cls.attribute_points_by_tier = importance_table(cls.importance_levels, cls.attribute_points,
+                                                        cls.default_attribute_points)
+        cls.skill_points_by_tier = importance_table(cls.importance_levels, cls.skill_points, cls.default_skill_points)
+        for name, (values, default) in cls.importance_values.items():
+            setattr(cls, name, importance_table(cls.importance_levels, values, default))
+
+    def __init__(self, data_dir=None, name_provider=None, ruleset_cache=True, metrics=None):
+        self.data_dir = data_dir or os.path.join(REPO_ROOT, self.data_folder)
+        # Any callable taking a culture and returning a full name, or the
+        # name of a backend: "api", "cache" or "offline"
+        if isinstance(name_provider, str):
+            name_provider = names.name_provider(name_provider)
+        self.name_provider = name_provider or names.generate_name
+        self.name_takes_rng = names.takes_rng(self.name_provider)
+        self._weights = {}
+        # (tier, params) -> compiled and checked constraints
+        self._constraints = {}
+        # Reuse the compiled snapshot of the JSON data between runs
+        self.ruleset_cache = ruleset_cache
+        # npcgen.metrics.Metrics collecting per-stage latencies, or None
+        self.metrics = metrics
+
+        # Load JSON data
+        self.load_json_data()
+        self.share_core()
+        # Interns what compact() stores; built per engine, not snapshotted
+        self.codec = RecordCodec(self.attribute_names, self.skill_names)
+
+    # Validate before loading json values; splats extend this for their own files
+    def validate_json_data(self):
+        if "Attributes" not in self.attributes_data:
+            raise KeyError("'Attributes' key not found in attributes data")
+        if "skills" not in self.skills_data:
+            raise KeyError("'skills' key not found in skills data")
+
+    def load_json_data(self):
+        if self.ruleset_cache:
+            from npcgen.ruleset import load_ruleset
+            vars(self).update(load_ruleset(self))
+        else:
+            self.parse_json_data()
+
+    def parse_json_data(self):
+        # Everything set here ends up in the compiled ruleset snapshot
+        # Digest of the JSON contents, recorded in seed codes so a code is
+        # never replayed against different rules
+        digest = hashlib.sha1()
+        core_digest = hashlib.sha1()
+        try:
+            for filename, attr in self.data_files.items():
+                with open(os.path.join(self.data_dir, filename), "rb") as f:
+                    raw = f.read()
+                digest.update(raw)
+                if attr in CORE_DATA:
+                    core_digest.update(raw)
+                setattr(self, attr, json.loads(raw.decode("utf-8")))
+        except FileNotFoundError as e:
+            logger.error(f"JSON file not found: {e.filename}")
+            raise
+        except json.JSONDecodeError as e:
+            logger.error(f"Error decoding JSON file: {e.msg}")
+            raise
+
+        # Create a dictionary to categorize attributes
+        self.attribute_categories = {
+            "Physical": self.attributes_data["Attributes"][:3],
+            "Social": self.attributes_data["Attributes"][3:6],
+            "Mental": self.attributes_data["Attributes"][6:]
+        }
+        self.attribute_names = [attr for category in self.attribute_categories.values() for attr in category]
+        self.skill_names = list(self.skills_data["skills"])
+        self.ruleset_fingerprint = digest.hexdigest()
+        self.core_fingerprint = core_digest.hexdigest()
+
+        # Validate the JSON data structure
+        self.validate_json_data()
+        self.build_tables()
+
+    def share_core(self):
+        # Splats loading identical attribute and skill files adopt the first
+        # engine's copy of them, so a mixed cast holds one rules core
+        core = _cores.setdefault(self.core_fingerprint, {attr: getattr(self, attr) for attr in CORE_TABLES})
+        vars(self).update(core)
+
+    def build_tables(self):
+        # Lookup tables derived from the validated JSON, compiled into the
+        # ruleset snapshot with it
+        pass
+
+    def tier(self, importance):
+        # Index of an importance into the importance tables; already
+        # resolved indexes pass straight through
+        if isinstance(importance, int):
+            return importance
+        return self.importance_indexes.get(importance, -1)
+
+    def stage(self, name):
+        # Context manager timing one generation stage; free when disabled.
+        # Stage boundaries are also where a cancelled job gives up.
+        jobs.checkpoint()
+        if self.metrics is None:
+            return NO_STAGE
+        return self.metrics.time(self.splat, name)
+
+    def generate_name(self, culture, rng=random):
+        if rng is random or not self.name_takes_rng:
+            return self.name_provider(culture)
+        # Seeded runs pass their stream to providers that take one, as the
+        # bundled providers all do, so the names repeat with the seed
+        return self.name_provider(culture, rng=rng)
+
+    def focus_weights(self, kind, skill_focuses):
+        key = (kind, frozenset(skill_focuses))
+        if key not in self._weights:
+            if kind == "attributes":
+                self._weights[key] = trait_weights(self.attribute_names, self.attribute_categories, skill_focuses)
+            else:
+                self._weights[key] = trait_weights(self.skill_names, SKILL_CATEGORIES, skill_focuses)
+        return self._weights[key]
+
+    def starting_dots(self, kind, skill_focuses, constraints=None):
+        # (dots, weights) to spend attribute or skill points from. Attributes
+        # start at 1 and skills at 0, or at their minimum; excluded traits
+        # get no weight, so they never rise above where they start.
+        if kind == "attributes":
+            names, floor, target = self.attribute_names, 1, ATTRIBUTE
+        else:
+            names, floor, target = self.skill_names, 0, SKILL
+        weights = self.focus_weights(kind, skill_focuses)
+        if constraints is None:
+            return [floor] * len(names), weights
+        key = (kind, frozenset(skill_focuses))
+        if key not in constraints.derived:
+            minimums = constraints.required(target)
+            excluded = constraints.excluded(target)
+            constraints.derived[key] = ([max(floor, minimums.get(name, 0)) for name in names],
+                                        [0 if name in excluded else weight for name, weight in zip(names, weights)])
+        dots, weights = constraints.derived[key]
+        # A fresh list of dots, since allocation spends points into it
+        return list(dots), weights
+
+    def generate_attributes(self, skill_focuses, importance, rng=random, constraints=None):
+        total_points = self.attribute_points_by_tier[self.tier(importance)]
+
+        # Initialize all attributes with 1 point
+        dots, weights = self.starting_dots("attributes", skill_focuses, constraints)
+        remaining_points = total_points - sum(dots)
+
+        allocate_points(dots, weights, remaining_points, rng=rng)
+        return dict(zip(self.attribute_names, dots))
+
+    def generate_skills(self, skill_focuses, importance, rng=random, constraints=None):
+        total_points = self.skill_points_by_tier[self.tier(importance)]
+
+        dots, weights = self.starting_dots("skills", skill_focuses, constraints)
+        allocate_points(dots, weights, total_points - sum(dots), rng=rng)
+
+        # Remove skills with 0 points
+        return {k: v for k, v in zip(self.skill_names, dots) if v > 0}
+
+    def batch_attributes(self, n, skill_focuses, importance, rng=None, constraints=None):
+        total_points = self.attribute_points_by_tier[self.tier(importance)]
+        base, weights = self.starting_dots("attributes", skill_focuses, constraints)
+        return allocate_batch(base, weights, total_points - sum(base), n, rng=rng)
+
+    def batch_skills(self, n, skill_focuses, importance, rng=None, constraints=None):
+        total_points = self.skill_points_by_tier[self.tier(importance)]
+        base, weights = self.starting_dots("skills", skill_focuses, constraints)
+        return allocate_batch(base, weights, total_points - sum(base), n, rng=rng)
+
+    def constraint_targets(self):
+        # Name -> (kind, highest level) of everything a constraint may name;
+        # splats add their disciplines, gifts, edges, ...
+        targets = {name: (SKILL, MAX_DOTS) for name in self.skill_names}
+        targets.update((name, (ATTRIBUTE, MAX_DOTS)) for name in self.attribute_names)
+        return targets
+
+    def constraints_for(self, params, tier):
+        # Compiled constraints of params, or None without any. Each set of
+        # specs is compiled and checked once per tier and constraint_fields,
+        # so a spec that can never be met fails here, before any name lookup
+        # or point is spent. The cache is bounded, as a long-running server
+        # sees any number of distinct specs.
+        if not params.constraints:
+            return None
+        key = (tier, params.constraints) + tuple(getattr(params, field) for field in self.constraint_fields)
+        constraints = self._constraints.get(key)
+        if constraints is None:
+            constraints = parse_constraints(params.constraints, self.constraint_targets())
+            self.check_constraints(constraints, params, tier)
+            if len(self._constraints) >= MAX_CONSTRAINT_SETS:
+                self._constraints.clear()
+            self._constraints[key] = constraints
+        return constraints
+
+    def check_constraints(self, constraints, params, tier):
+        # Raise ValueError if no character with these inputs can meet the
+        # constraints; splats extend this for their own sections
+        importance = params.importance or "the default importance"
+        attributes = constraints.required(ATTRIBUTE)
+        needed = sum(max(0, attributes.get(name, 1) - 1) for name in self.attribute_names)
+        available = self.attribute_points_by_tier[tier] - len(self.attribute_names)
+        if needed > available:
+            raise ValueError(f"Attribute minimums need {needed} dots above 1 but {importance} only has {available}")
+        needed = sum(constraints.required(SKILL).values())
+        available = self.skill_points_by_tier[tier]
+        if needed > available:
+            raise ValueError(f"Skill minimums need {needed} dots but {importance} only has {available}")
+
+    def generate(self, params, attributes=None, skills=None, rng=random, name=None):
+        raise NotImplementedError
+
+    def format_character(self, character):
+        with self.stage("format"):
+            lines = []
+            for key, value in character.items():
+                self.format_section(key, value, lines)
+            return "".join(lines)
+
+    def format_section(self, key, value, lines):
+        # Append one section's text to lines; splats handle the sections
+        # with a layout of their own and pass the rest on to here
+        if isinstance(value, dict):
+            lines.append(f"{key}:\n")
+            for sub_key, sub_value in value.items():
+                lines.append(f"  {sub_key}: {sub_value}\n")
+        elif isinstance(value, list):
+            lines.append(f"{key}:\n")
+            for item in value:
+                lines.append(f"  - {item}\n")
+        else:
+            lines.append(f"{key}: {value}\n")
+
+    def reroll(self, character, params, sections, rng=random):
+        # A copy of character with only the named sections generated afresh;
+        # everything else, the name included, is kept as it is
+        unknown = [section for section in sections if section not in self.sections]
+        if unknown:
+            raise ValueError(f"Cannot reroll {', '.join(unknown)}; expected any of {', '.join(self.sections)}")
+        tier = self.tier(params.importance)
+        rerolled = dict(character)
+        # The old seed code no longer describes this sheet
+        rerolled.pop("Seed Code", None)
+        for section, (stage, generate) in self.sections.items():
+            if section in sections:
+                with self.stage(stage):
+                    rerolled[section] = generate(self, params, tier, rng)
+        return rerolled
+
+    def compact(self, character):
+        # A CharacterRecord holding character in a fraction of the memory,
+        # for keeping large batches around
+        return self.codec.encode(character)
+
+    def generate_seeded(self, params, seed=None):
+        # Generate from a fresh 64-bit seed and record a short seed code on
+        # the character; regenerate(code, params) rebuilds the same sheet
+        seed = seedcode.new_seed() if seed is None else seed
+        character = self.generate(params, rng=random.Random(seed))
+        character["Seed Code"] = seedcode.encode(self.seed_tag, self.ruleset_fingerprint, seed)
+        return character
+
+    def regenerate(self, code, params):
+        tag, fingerprint, seed = seedcode.decode(code)
+        if tag != self.seed_tag:
+            raise ValueError(f"Seed code {code} belongs to another character type")
+        if not self.ruleset_fingerprint.startswith(fingerprint):
+            raise ValueError(f"Seed code {code} was made with a different version of the JSON data")
+        return self.generate_seeded(params, seed)
+
+    def iter_many(self, n, params, seed=None, chunk_size=1000):
+        # generate_many in fixed-size chunks, for streaming large batches in
+        # one process; a seed gives the same characters as iter_parallel
+        from npcgen.parallel import chunk_seeds
+        if seed is None:
+            chunks = [(min(chunk_size, n - start), None) for start in range(0, n, chunk_size)]
+        else:
+            chunks = chunk_seeds(n, seed, chunk_size)
+        for count, chunk_seed in chunks:
+            yield from self.generate_many(count, params, seed=chunk_seed)
+
+    @staticmethod
+    def batch_streams(seed=None):
+        # (NumPy generator, random.Random) for a batch. With a seed (an int or
+        # a numpy SeedSequence) both are spawned from it, so the batch is
+        # fully reproducible.
+        if seed is None:
+            return None, random
+        seed = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        batch_seed, character_seed = seed.spawn(2)
+        return (np.random.default_rng(batch_seed),
+                random.Random(int.from_bytes(character_seed.generate_state(4).tobytes(), "little")))
+
+    def generate_many(self, n, params, seed=None):
+        batch_rng, rng = self.batch_streams(seed)
+        return self.generate_batch([params] * n, batch_rng, rng)
+
+    def generate_batch(self, members, batch_rng=None, rng=random, names=None):
+        # One character per params in members, which share their skill focus
+        # and importance. Attribute and skill points for the whole batch are
+        # spent at once; names, when given, replace the per-character lookup.
+        if not members:
+            return []
+        params = members[0]
+        tier = self.tier(params.importance)
+        # Members differ at most in spread fields; check each before spending
+        for member in members:
+            self.constraints_for(member, tier)
+        constraints = self.constraints_for(params, tier)
+        with self.stage("batch_attributes"):
+            attribute_rows = self.batch_attributes(len(members), params.skill_focus, tier, rng=batch_rng,
+                                                   constraints=constraints).tolist()
+        with self.stage("batch_skills"):
+            skill_rows = self.batch_skills(len(members), params.skill_focus, tier, rng=batch_rng,
+                                           constraints=constraints).tolist()
+
+        sections = self.batch_sections(members, tier, rng=batch_rng)
+
+        characters = []
+        for i, (member, attribute_row, skill_row) in enumerate(zip(members, attribute_rows, skill_rows)):
+            attributes = dict(zip(self.attribute_names, attribute_row))
+            skills = {k: v for k, v in zip(self.skill_names, skill_row) if v > 0}
+            characters.append(self.generate(member, attributes=attributes, skills=skills, rng=rng,
+                                            name=None if names is None else names[i],
+                                            **{section: values[i] for section, values in sections.items()}))
+        return characters
+
+    def batch_sections(self, members, tier, rng=None):
+        # Keyword argument of generate -> one value per member, for sections
+        # a splat draws for the whole batch at once
+        return {}
+
+    def generate_group(self, k, params, seed=None, spread=None, distinct=None):
+        # k related characters in one call: a coterie, pack or cell. The k
+        # names come from one batched draw and the points from one matrix.
+        # spread deals out the values of a params field so members differ,
+        # either a field name from spread_options ("auspice") or a mapping
+        # of fields to values. distinct names a section from
+        # distinct_sections, e.g. "Disciplines": no two members may hold the
+        # same set of trait names in it, whatever their levels.
+        if k < 0:
+            raise ValueError(f"Cannot generate a group of {k}")
+        if k == 0:
+            return []
+        batch_rng, rng = self.batch_streams(seed)
+        members = [params] * k
+        if spread:
+            if isinstance(spread, str):
+                if spread not in self.spread_options:
+                    raise ValueError(f"Cannot spread {spread}; expected one of {', '.join(self.spread_options)}")
+                spread = {spread: self.spread_options[spread]}
+            for field, values in spread.items():
+                if field in ("importance", "skill_focus", "constraints"):
+                    raise ValueError(f"Group members share their {field}")
+                if not values:
+                    raise ValueError(f"No values to spread for {field}")
+            dealt = {field: rng.sample(list(values), len(values)) for field, values in spread.items()}
+            members = [dataclasses.replace(params, **{field: values[i % len(values)]
+                                                      for field, values in dealt.items()})
+                       for i in range(k)]
+
+        # Check the constraints of every member before drawing names
+        tier = self.tier(params.importance)
+        for member in members:
+            self.constraints_for(member, tier)
+
+        with self.stage("name"):
+            group_names = names.draw_names(self.name_provider, params.culture, k, rng)
+        characters = self.generate_batch(members, batch_rng, rng, names=group_names)
+
+        if distinct:
+            if distinct not in self.distinct_sections:
+                raise ValueError(f"Cannot keep {distinct} distinct; "
+                                 f"expected one of {', '.join(self.distinct_sections)}")
+            traits = self.distinct_sections[distinct]
+            seen = set()
+            for i, member in enumerate(members):
+                rerolls = 0
+                while traits(characters[i][distinct]) in seen and rerolls < MAX_DISTINCT_REROLLS:
+                    characters[i] = self.reroll(characters[i], member, [distinct], rng=rng)
+                    rerolls += 1
+                if traits(characters[i][distinct]) in seen:
+                    logger.warning(f"Could not give every group member a distinct {distinct}")
+                seen.add(traits(characters[i][distinct]))
+        return characters
@@ -0,0 +1,171 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+from itertools import islice
+
+from npcgen.columnar import ColumnWriter
+from npcgen.metrics import Metrics
+from npcgen.record import CharacterRecord
+
+logger = logging.getLogger(__name__)
+
+# Rows handed to the file per write call, and the file buffer behind them
+WRITE_BATCH = 1000
+BUFFER_SIZE = 1 << 20
+
+# Character sections whose traits become one CSV column each
+TRAIT_SECTIONS = ("Attributes", "Skills")
+
+
+def batched(iterable, size=WRITE_BATCH):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def plain(character):
+    # CharacterRecords from engine.compact are written as the dicts they hold
+    return character.to_dict() if isinstance(character, CharacterRecord) else character
+
+
+def open_output(path, binary=False):
+    options = {"mode": "wb"} if binary else {"mode": "w", "encoding": "utf-8", "newline": ""}
+    if path == "-":
+        return open(sys.stdout.fileno(), buffering=BUFFER_SIZE, closefd=False, **options)
+    return open(path, buffering=BUFFER_SIZE, **options)
+
+
+def write_jsonl(characters, f, engine=None):
+    # One JSON object per line; nested sections are kept as they are
+    count = 0
+    for batch in batched(characters):
+        f.writelines(json.dumps(plain(character), ensure_ascii=False) + "\n" for character in batch)
+        count += len(batch)
+    return count
+
+
+def csv_columns(engine, character):
+    # Top-level fields in character order, with Attributes and Skills spread
+    # over one column per trait so every row has the same header
+    columns = []
+    for key in character:
+        if key == "Attributes":
+            columns += [f"Attributes.{name}" for name in engine.attribute_names]
+        elif key == "Skills":
+            columns += [f"Skills.{name}" for name in engine.skill_names]
+        else:
+            columns.append(key)
+    return columns
+
+
+def csv_row(columns, character):
+    row = []
+    for column in columns:
+        section, _, trait = column.partition(".")
+        if trait and section in TRAIT_SECTIONS:
+            row.append(character[section].get(trait, 0))
+            continue
+        value = character.get(column, "")
+        # Disciplines, Gifts, Talismans, Caern, Edges and Perks, ... stay
+        # nested as compact JSON inside their cell
+        if isinstance(value, (dict, list)):
+            value = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        row.append(value)
+    return row
+
+
+def write_csv(characters, f, engine):
+    writer = csv.writer(f)
+    columns = None
+    count = 0
+    for batch in batched(characters):
+        if columns is None:
+            columns = csv_columns(engine, batch[0])
+            writer.writerow(columns)
+        writer.writerows(csv_row(columns, plain(character)) for character in batch)
+        count += len(batch)
+    return count
+
+
+def write_npz(characters, f, engine):
+    # Columnar: each batch becomes a row group of NumPy columns, see
+    # npcgen.columnar.read_columns
+    writer = ColumnWriter(f, engine)
+    count = 0
+    for batch in batched(characters):
+        writer.write([plain(character) for character in batch])
+        count += len(batch)
+    writer.close()
+    return count
+
+
+WRITERS = {
+    "jsonl": write_jsonl,
+    "csv": write_csv,
+    "npz": write_npz,
+}
+
+# Formats written as bytes rather than text
+BINARY_FORMATS = {"npz"}
+
+
+def export(characters, path, engine, fmt=None):
+    # Stream characters (any iterable, e.g. engine.iter_many or
+    # iter_parallel) to path; fmt defaults to the file extension
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of {', '.join(WRITERS)}")
+    with open_output(path, binary=fmt in BINARY_FORMATS) as f:
+        count = WRITERS[fmt](characters, f, engine)
+    logger.info(f"Wrote {count} characters to {path}")
+    return count
+
+
+def main(argv=None):
+    from npcgen.parallel import iter_parallel
+    from npcgen.splats import SPLATS as splats, parse_params
+
+    parser = argparse.ArgumentParser(prog="python -m npcgen.export",
+                                     description="Generate NPCs in bulk and stream them to a file.")
+    parser.add_argument("splat", choices=splats)
+    parser.add_argument("count", type=int)
+    parser.add_argument("output", help="output file, or - for stdout")
+    parser.add_argument("--format", choices=WRITERS, help="defaults to the output file extension")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--workers", type=int, help="worker processes, defaults to all cores")
+    parser.add_argument("--names", default="offline", help="name backend: offline, cache or api")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="time every generation stage, print a summary and write OpenMetrics text to FILE")
+    parser.add_argument("--set", dest="params", action="append", default=[], metavar="KEY=VALUE",
+                        help="generation input, e.g. --set clan=Brujah --set skill_focus=Social,Mental")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    engine_class, params_class = splats[args.splat]
+    try:
+        params = parse_params(params_class, dict(assignment.partition("=")[::2] for assignment in args.params))
+    except ValueError as e:
+        raise SystemExit(str(e))
+    # Header information only; generation happens in the workers
+    engine = engine_class(name_provider=lambda culture: "")
+    try:
+        # Constraints no character can meet fail here, not in every worker
+        engine.constraints_for(params, engine.tier(params.importance))
+    except ValueError as e:
+        raise SystemExit(str(e))
+    metrics = Metrics() if args.metrics else None
+    characters = iter_parallel(engine_class, args.count, params, seed=args.seed,
+                               workers=args.workers, name_backend=args.names, metrics=metrics)
+    export(characters, args.output, engine, fmt=args.format)
+
+    if metrics is not None:
+        with open(args.metrics, "w", encoding="utf-8") as f:
+            f.write(metrics.openmetrics())
+        sys.stderr.write(metrics.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+import logging
+import random
+from dataclasses import dataclass
+
+from npcgen.catalog import AdvantageCatalog, GiftCatalog
+from npcgen.constraints import GIFT
+from npcgen.engine import ALL_FOCUSES, CharacterEngine
+from npcgen.merits import MeritsMixin
+
+logger = logging.getLogger(__name__)
+
+# Gift categories, each drawn from once before the top-up
+GIFT_CATEGORIES = ("Breed", "Auspice", "Tribe")
+
+
+@dataclass
+class WerewolfParams:
+    auspice: str = ""
+    tribe: str = ""
+    breed: str = ""
+    importance: str = ""
+    skill_focus: tuple = ALL_FOCUSES
+    culture: str = ""
+    # Constraint specs such as "Stealth>=4", "Resources" or "!Brawl"
+    constraints: tuple = ()
+
+    def __post_init__(self):
+        # Default to all focuses if none selected
+        self.skill_focus = tuple(self.skill_focus) or ALL_FOCUSES
+        self.constraints = tuple(self.constraints)
+
+
+class WerewolfEngine(MeritsMixin, CharacterEngine):
+    data_folder = "Werewolves"
+    splat = "werewolf"
+    seed_tag = "W"
+    importance_levels = ("Cub", "Cliath", "Fostern", "Adren", "Athro", "Elder", "Legendary",
+                         "Thug", "Minor", "Important", "Boss", "Big Bad")
+    attribute_points = {
+        "Cub": 12, "Cliath": 15, "Fostern": 18, "Adren": 21,
+        "Athro": 24, "Elder": 27, "Legendary": 30
+    }
+    skill_points = {
+        "Thug": 20, "Minor": 25, "Important": 30, "Boss": 35,
+        "Big Bad": 40, "Legendary": 45
+    }
+    importance_values = {
+        "gift_count": ({
+            "Cub": 2, "Cliath": 3, "Fostern": 4, "Adren": 5,
+            "Athro": 6, "Elder": 7, "Legendary": 8
+        }, 3),
+        # Highest gift rank open to the character
+        "gift_rank": ({
+            "Cub": 1, "Cliath": 1, "Fostern": 2, "Adren": 3, "Athro": 4, "Elder": 5, "Legendary": 5,
+            "Thug": 1, "Minor": 1, "Important": 2, "Boss": 3, "Big Bad": 4
+        }, 1),
+        "flaw_count": ({
+            "Cub": 2, "Cliath": 2, "Fostern": 2, "Adren": 1,
+            "Athro": 1, "Elder": 1, "Legendary": 0
+        }, 2),
+        # Merits, backgrounds and talismans all scale with this
+        "advantage_count": ({
+            "Cub": 1, "Cliath": 2, "Fostern": 3, "Adren": 4,
+            "Athro": 5, "Elder": 6, "Legendary": 7
+        }, 2),
+    }
+    sections = {
+        "Name": ("name", lambda self, params, tier, rng: self.generate_name(params.culture, rng=rng)),
+        "Attributes": ("attributes", lambda self, params, tier, rng: self.generate_attributes(
+            params.skill_focus, tier, rng=rng, constraints=self.constraints_for(params, tier))),
+        "Skills": ("skills", lambda self, params, tier, rng: self.generate_skills(
+            params.skill_focus, tier, rng=rng, constraints=self.constraints_for(params, tier))),
+        "Gifts": ("gifts", lambda self, params, tier, rng: self.generate_gifts(
+            params.auspice, params.tribe, params.breed, tier, rng=rng, constraints=self.constraints_for(params, tier))),
+        "Merits and Flaws": ("merits_and_flaws",
+            lambda self, params, tier, rng: self.generate_merits_and_flaws(tier, rng=rng)),
+        "Backgrounds": ("backgrounds", lambda self, params, tier, rng: self.generate_backgrounds(
+            tier, rng=rng, constraints=self.constraints_for(params, tier))),
+        "Talismans": ("talismans", lambda self, params, tier, rng: self.generate_talismans(tier, rng=rng)),
+        "Caern": ("caern", lambda self, params, tier, rng: self.generate_caern(tier, rng=rng)),
+    }
+    distinct_sections = {
+        "Skills": frozenset,
+        "Gifts": frozenset,
+        "Merits and Flaws": lambda section: frozenset(
+            entry["name"] for entries in section.values() for entry in entries),
+        "Backgrounds": frozenset,
+        "Talismans": lambda section: frozenset(talisman["Name"] for talisman in section),
+    }
+    data_files = {
+        "5eAttributes.json": "attributes_data",
+        "5eSkills.json": "skills_data",
+        "5eCaerns.json": "caerns_data",
+        "5eTalismans.json": "talismans_data",
+        "5eMerits.json": "merits_data",
+        "5eBackgrounds.json": "backgrounds_data",
+        "5eGifts.json": "gifts_data",
+    }
+
+    # Validate before loading json values
+    def validate_json_data(self):
+        super().validate_json_data()
+        if "Caern" not in self.caerns_data:
+            raise KeyError("'Caern' key not found in caerns data")
+        if "Talismans" not in self.talismans_data:
+            raise KeyError("'Talismans' key not found in talismans data")
+        for category in GIFT_CATEGORIES:
+            if category not in self.gifts_data.get("Gifts", {}):
+                raise KeyError(f"'{category}' key not found in gifts data")
+
+    def build_tables(self):
+        super().build_tables()
+        self.talisman_catalog = AdvantageCatalog(self.talismans_data["Talismans"])
+        self.gift_catalog = GiftCatalog(self.gifts_data["Gifts"])
+        caern_data = self.caerns_data["Caern"]
+        self.bawn_traits = caern_data.get("Bawn Traits", [])
+        self.spiritual_traits = caern_data.get("Spiritual Power Traits", {}).get("Bawn Traits", [])
+        self.spread_options = {
+            "auspice": list(self.gift_catalog.groups["Auspice"]),
+            "tribe": list(self.gift_catalog.groups["Tribe"]),
+            "breed": list(self.gift_catalog.groups["Breed"]),
+        }
+
+    def constraint_targets(self):
+        targets = super().constraint_targets()
+        targets.update((name, (GIFT, 1)) for name in self.gift_catalog.names)
+        return targets
+
+    def check_constraints(self, constraints, params, tier):
+        super().check_constraints(constraints, params, tier)
+        importance = params.importance or "the default importance"
+        gifts = constraints.required(GIFT)
+        if len(gifts) > self.gift_count[tier]:
+            raise ValueError(f"{importance} has {self.gift_count[tier]} gifts, fewer than the {len(gifts)} required")
+        rank = self.gift_rank[tier]
+        too_high = [name for name in gifts if self.gift_catalog.lowest_rank[self.gift_catalog.ids[name]] > rank]
+        if too_high:
+            raise ValueError(f"Gifts above rank {rank}, the highest open to {importance}: {', '.join(too_high)}")
+
+    def generate(self, params, attributes=None, skills=None, rng=random, name=None):
+        tier = self.tier(params.importance)
+        constraints = self.constraints_for(params, tier)
+        with self.stage("total"):
+            with self.stage("name"):
+                if name is None:
+                    name = self.generate_name(params.culture, rng=rng)
+
+            character = {
+                "Name": name,
+                "Breed": params.breed,
+                "Auspice": params.auspice,
+                "Tribe": params.tribe
+            }
+
+            with self.stage("attributes"):
+                if attributes is None:
+                    attributes = self.generate_attributes(params.skill_focus, tier, rng=rng, constraints=constraints)
+                character["Attributes"] = attributes
+
+            with self.stage("skills"):
+                if skills is None:
+                    skills = self.generate_skills(params.skill_focus, tier, rng=rng, constraints=constraints)
+                character["Skills"] = skills
+
+            with self.stage("gifts"):
+                character["Gifts"] = self.generate_gifts(params.auspice, params.tribe, params.breed, tier, rng=rng,
+                                                         constraints=constraints)
+
+            with self.stage("merits_and_flaws"):
+                character["Merits and Flaws"] = self.generate_merits_and_flaws(tier, rng=rng)
+
+            with self.stage("backgrounds"):
+                character["Backgrounds"] = self.generate_backgrounds(tier, rng=rng, constraints=constraints)
+
+            with self.stage("talismans"):
+                character["Talismans"] = self.generate_talismans(tier, rng=rng)
+
+            with self.stage("caern"):
+                character["Caern"] = self.generate_caern(tier, rng=rng)
+
+        logger.debug(f"Generated character {name}")
+        return character
+
+    def generate_gifts(self, auspice, tribe, breed, importance, rng=random, constraints=None):
+        # One gift from each of breed, auspice and tribe, then more from all
+        # three together, none above the character's rank. An unset or
+        # unknown breed, auspice or tribe draws from every gift of its kind.
+        # Required gifts come first and count towards the total.
+        tier = self.tier(importance)
+        total_gifts = self.gift_count[tier]
+        rank = self.gift_rank[tier]
+        catalog = self.gift_catalog
+        keys = [catalog.key(category, group) for category, group in zip(GIFT_CATEGORIES, (breed, auspice, tribe))]
+
+        selected = []
+        excluded = []
+        if constraints is not None:
+            selected = [catalog.ids[name] for name in constraints.required(GIFT)]
+            excluded = [catalog.ids[name] for name in constraints.excluded(GIFT)]
+        for key in keys:
+            if len(selected) < total_gifts:
+                selected += catalog.sample(key, rank, 1, rng=rng, exclude=selected + excluded)
+        selected += catalog.sample(catalog.union(keys), rank, total_gifts - len(selected), rng=rng,
+                                   exclude=selected + excluded)
+        if len(selected) < total_gifts:
+            logger.warning(f"Only {len(selected)} distinct gifts available, {total_gifts} wanted")
+
+        return [catalog.names[gift] for gift in selected]
+
+    def generate_talismans(self, importance, rng=random):
+        total_talismans = self.advantage_count[self.tier(importance)]
+
+        selected_talismans = []
+        for advantage in self.talisman_catalog.pick_per_group(total_talismans, rng):
+            selected_talismans.append({
+                "Name": advantage["name"],
+                "Description": advantage["desc"],
+                "Cost": advantage["cost"],
+                "Single Use": advantage.get("single_use", False)
+            })
+
+        return selected_talismans
+
+    def generate_caern(self, importance, rng=random):
+        # For simplicity, select random Bawn Traits and Spiritual Power Traits
+        bawn_traits = self.bawn_traits
+        spiritual_traits = self.spiritual_traits
+
+        selected_bawn_traits = rng.sample(bawn_traits, min(len(bawn_traits), 2))
+        selected_spiritual_traits = rng.sample(spiritual_traits, min(len(spiritual_traits), 2))
+
+        return {
+            "Bawn Traits": selected_bawn_traits,
+            "Spiritual Power Traits": selected_spiritual_traits
+        }
+
+    def format_section(self, key, value, lines):
+        if key == "Talismans":
+            lines.append(f"{key}:\n")
+            for talisman in value:
+                lines.append(f"  {talisman['Name']} (Cost: {talisman['Cost']}, Single Use: {talisman['Single Use']}):\n")
+                lines.append(f"    Description: {talisman['Description']}\n")
+        elif key == "Caern":
+            lines.append(f"{key}:\n")
+            lines.append(f"  Bawn Traits: {', '.join(value['Bawn Traits'])}\n")
+            lines.append(f"  Spiritual Power Traits: {', '.join(value['Spiritual Power Traits'])}\n")
+        else:
+            super().format_section(key, value, lines)
@@ -0,0 +1,219 @@
+import logging
+import random
+from dataclasses import dataclass
+
+from npcgen.catalog import EdgeCatalog
+from npcgen.constraints import EDGE
+from npcgen.engine import ALL_FOCUSES, CharacterEngine
+from npcgen.merits import MeritsMixin
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HunterParams:
+    creed: str = ""
+    drive: str = ""
+    importance: str = ""
+    skill_focus: tuple = ALL_FOCUSES
+    culture: str = ""
+    # Constraint specs such as "Stealth>=4", "Resources" or "!Brawl"
+    constraints: tuple = ()
+
+    def __post_init__(self):
+        # Default to all focuses if none selected
+        self.skill_focus = tuple(self.skill_focus) or ALL_FOCUSES
+        self.constraints = tuple(self.constraints)
+
+
+class HunterEngine(MeritsMixin, CharacterEngine):
+    data_folder = "Humans_Hunters"
+    splat = "hunter"
+    seed_tag = "H"
+    importance_levels = ("Thug", "Minor", "Important", "Boss", "Big Bad", "Legendary")
+    attribute_points = {
+        "Thug": 12, "Minor": 15, "Important": 18, "Boss": 21,
+        "Big Bad": 24, "Legendary": 27
+    }
+    skill_points = {
+        "Thug": 20, "Minor": 25, "Important": 30, "Boss": 35,
+        "Big Bad": 40, "Legendary": 45
+    }
+    importance_values = {
+        # Edges, merits and backgrounds all scale with this
+        "advantage_count": ({
+            "Thug": 1, "Minor": 2, "Important": 3, "Boss": 4,
+            "Big Bad": 5, "Legendary": 6
+        }, 2),
+        "flaw_count": ({
+            "Thug": 2, "Minor": 2, "Important": 2, "Boss": 1,
+            "Big Bad": 1, "Legendary": 0
+        }, 2),
+        "safe_house_points": ({
+            "Thug": 1, "Minor": 2, "Important": 3, "Boss": 3,
+            "Big Bad": 3, "Legendary": 3
+        }, 1),
+    }
+    sections = {
+        "Name": ("name", lambda self, params, tier, rng: self.generate_name(params.culture, rng=rng)),
+        "Attributes": ("attributes", lambda self, params, tier, rng: self.generate_attributes(
+            params.skill_focus, tier, rng=rng, constraints=self.constraints_for(params, tier))),
+        "Skills": ("skills", lambda self, params, tier, rng: self.generate_skills(
+            params.skill_focus, tier, rng=rng, constraints=self.constraints_for(params, tier))),
+        "Edges and Perks": ("edges_and_perks", lambda self, params, tier, rng: self.generate_edges_and_perks(
+            params.creed, tier, rng=rng, constraints=self.constraints_for(params, tier))),
+        "Merits and Flaws": ("merits_and_flaws",
+            lambda self, params, tier, rng: self.generate_merits_and_flaws(tier, rng=rng)),
+        "Backgrounds": ("backgrounds", lambda self, params, tier, rng: self.generate_backgrounds(
+            tier, rng=rng, constraints=self.constraints_for(params, tier))),
+        "Safe House": ("safe_house", lambda self, params, tier, rng: self.generate_safe_house(tier)),
+    }
+    constraint_fields = ("creed",)
+    distinct_sections = {
+        "Skills": frozenset,
+        "Edges and Perks": lambda section: frozenset(entry["Edge"] for entry in section),
+        "Merits and Flaws": lambda section: frozenset(
+            entry["name"] for entries in section.values() for entry in entries),
+        "Backgrounds": frozenset,
+    }
+    data_files = {
+        "5eAttributes.json": "attributes_data",
+        "5eSkills.json": "skills_data",
+        "creeds.json": "creeds_data",
+        "drives.json": "drives_data",
+        "edgesAndPerks.json": "edges_and_perks_data",
+        "safeHouses.json": "safe_houses_data",
+        "5eMerits.json": "merits_data",
+        "5eBackgrounds.json": "backgrounds_data",
+    }
+
+    # Validate before loading json values
+    def validate_json_data(self):
+        super().validate_json_data()
+        if not isinstance(self.creeds_data, list):
+            raise ValueError("Creeds data is not a list")
+        if not isinstance(self.drives_data, list):
+            raise ValueError("Drives data is not a list")
+        if "Assets" not in self.edges_and_perks_data:
+            raise KeyError("'Assets' key not found in edges and perks data")
+        if "Safe House" not in self.safe_houses_data:
+            raise KeyError("'Safe House' key not found in safe houses data")
+
+    def build_tables(self):
+        super().build_tables()
+        self.edge_catalog = EdgeCatalog(self.edges_and_perks_data, self.creeds_data)
+        for creed in self.creeds_data:
+            unknown = [name for name in creed.get("edges", []) if name not in self.edge_catalog.edge_names]
+            if unknown:
+                logger.warning(f"Creed {creed['name']} lists unknown edges: {', '.join(unknown)}")
+        safe_house = self.safe_houses_data["Safe House"]["Safe House"]["advantages"][0]
+        self.safe_house_max_cost = safe_house["maxCost"]
+        self.safe_house_desc = safe_house["desc"]
+        self.spread_options = {
+            "creed": [creed["name"] for creed in self.creeds_data],
+            "drive": [drive["name"] for drive in self.drives_data],
+        }
+
+    def constraint_targets(self):
+        targets = super().constraint_targets()
+        targets.update((name, (EDGE, 1)) for name in self.edge_catalog.edge_names)
+        return targets
+
+    def check_constraints(self, constraints, params, tier):
+        super().check_constraints(constraints, params, tier)
+        importance = params.importance or "the default importance"
+        count = self.advantage_count[tier]
+        if len(constraints.required(EDGE)) > count:
+            raise ValueError(f"{importance} has {count} edges, fewer than the {len(constraints.required(EDGE))} required")
+        excluded = constraints.excluded(EDGE)
+        if len(constraints.required(EDGE)) < count and not self.edge_catalog.edges_for(params.creed, excluded):
+            raise ValueError(f"Every edge is excluded, but {importance} draws {count}")
+
+    def generate(self, params, attributes=None, skills=None, rng=random, name=None, edges_and_perks=None):
+        tier = self.tier(params.importance)
+        constraints = self.constraints_for(params, tier)
+        with self.stage("total"):
+            with self.stage("name"):
+                if name is None:
+                    name = self.generate_name(params.culture, rng=rng)
+
+            character = {
+                "Name": name,
+                "Creed": params.creed,
+                "Drive": params.drive
+            }
+
+            with self.stage("attributes"):
+                if attributes is None:
+                    attributes = self.generate_attributes(params.skill_focus, tier, rng=rng, constraints=constraints)
+                character["Attributes"] = attributes
+
+            with self.stage("skills"):
+                if skills is None:
+                    skills = self.generate_skills(params.skill_focus, tier, rng=rng, constraints=constraints)
+                character["Skills"] = skills
+
+            with self.stage("edges_and_perks"):
+                if edges_and_perks is None:
+                    edges_and_perks = self.generate_edges_and_perks(params.creed, tier, rng=rng,
+                                                                    constraints=constraints)
+                character["Edges and Perks"] = edges_and_perks
+
+            with self.stage("merits_and_flaws"):
+                character["Merits and Flaws"] = self.generate_merits_and_flaws(tier, rng=rng)
+
+            with self.stage("backgrounds"):
+                character["Backgrounds"] = self.generate_backgrounds(tier, rng=rng, constraints=constraints)
+
+            character["Safe House"] = self.generate_safe_house(tier)
+
+        logger.debug(f"Generated character {name}")
+        return character
+
+    def generate_edges_and_perks(self, creed, importance, rng=random, constraints=None):
+        # Edges from the creed's list, each with two of its perks
+        count = self.advantage_count[self.tier(importance)]
+        if constraints is None:
+            return self.edge_catalog.sample(creed, count, rng=rng)
+        return self.edge_catalog.sample(creed, count, rng=rng, required=tuple(constraints.required(EDGE)),
+                                        excluded=constraints.excluded(EDGE))
+
+    def batch_sections(self, members, tier, rng=None):
+        # Edges and perks for the whole batch, one sample_many call per creed
+        constraints = self.constraints_for(members[0], tier)
+        required = tuple(constraints.required(EDGE)) if constraints else ()
+        excluded = constraints.excluded(EDGE) if constraints else ()
+        groups = {}
+        for i, member in enumerate(members):
+            groups.setdefault(member.creed, []).append(i)
+        edges_and_perks = [None] * len(members)
+        with self.stage("batch_edges_and_perks"):
+            for creed, indexes in groups.items():
+                drawn = self.edge_catalog.sample_many(len(indexes), creed, self.advantage_count[tier], rng,
+                                                      required=required, excluded=excluded)
+                for i, edges in zip(indexes, drawn):
+                    edges_and_perks[i] = edges
+        return {"edges_and_perks": edges_and_perks}
+
+    def generate_safe_house(self, importance):
+        points = min(self.safe_house_points[self.tier(importance)], self.safe_house_max_cost)
+
+        return {
+            "Safe House": points,
+            "Description": self.safe_house_desc
+        }
+
+    def format_section(self, key, value, lines):
+        if key == "Edges and Perks":
+            lines.append(f"{key}:\n")
+            for edge in value:
+                lines.append(f"  Edge: {edge['Edge']}\n")
+                lines.append(f"    Description: {edge['Description']}\n")
+                if edge['Perks']:
+                    lines.append(f"    Perks:\n")
+                    for perk in edge['Perks']:
+                        lines.append(f"      - {perk['name']}: {perk['desc']}\n")
+        elif key == "Safe House":
+            lines.append(f"{key} (Level {value['Safe House']}): {value['Description']}\n")
+        else:
+            super().format_section(key, value, lines)
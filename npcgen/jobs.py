@@ -0,0 +1,191 @@
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class Cancelled(BaseException):
+    # A BaseException, like asyncio.CancelledError, so the broad
+    # "except Exception" fallbacks in the name lookups let it through
+    pass
+
+
+class DeadlineExceeded(Cancelled):
+    pass
+
+
+class CancelToken:
+    # Shared between a job and whoever submitted it. Generation checks it
+    # between stages and the name client bounds its requests by it.
+    def __init__(self, timeout=None):
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def remaining(self):
+        # Seconds left before the deadline, or None without one
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self):
+        if self._event.is_set():
+            raise Cancelled("Cancelled")
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise DeadlineExceeded("Deadline exceeded")
+
+    def sleep(self, seconds):
+        # Sleep that wakes up early on cancel and never outlasts the deadline
+        remaining = self.remaining()
+        if remaining is not None:
+            seconds = min(seconds, remaining)
+        self._event.wait(seconds)
+        self.check()
+
+
+# Token of the job running in this thread, if any
+_current = contextvars.ContextVar("npcgen_job_token", default=None)
+
+
+def current_token():
+    return _current.get()
+
+
+def checkpoint():
+    # Raise Cancelled if the job running in this thread has been cancelled
+    # or is past its deadline; free outside jobs
+    token = _current.get()
+    if token is not None:
+        token.check()
+
+
+def sleep(seconds):
+    token = _current.get()
+    if token is None:
+        time.sleep(seconds)
+    else:
+        token.sleep(seconds)
+
+
+def bounded_timeout(timeout):
+    # A socket timeout that ends no later than the current job's deadline
+    token = _current.get()
+    if token is None:
+        return timeout
+    token.check()
+    remaining = token.remaining()
+    if remaining is None:
+        return timeout
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+class Job:
+    def __init__(self, fn, args, kwargs, timeout):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.token = CancelToken(timeout)
+        self.future = Future()
+
+    def cancel(self):
+        # Pending jobs never start; a running job stops at its next checkpoint
+        self.token.cancel()
+        self.future.cancel()
+
+    def done(self):
+        return self.future.done()
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+    def add_done_callback(self, callback):
+        self.future.add_done_callback(lambda future: callback(self))
+
+    def run(self):
+        if not self.future.set_running_or_notify_cancel():
+            return
+        reset = _current.set(self.token)
+        try:
+            self.token.check()
+            result = self.fn(*self.args, **self.kwargs)
+        except BaseException as e:
+            self.future.set_exception(e)
+        else:
+            self.future.set_result(result)
+        finally:
+            _current.reset(reset)
+
+
+class JobExecutor:
+    # A fixed number of worker threads fed from a bounded queue. When the
+    # queue is full the oldest pending job is cancelled to make room, so
+    # repeated submissions never pile up threads or sockets.
+    def __init__(self, workers=1, max_pending=8, timeout=None):
+        self.workers = workers
+        self.max_pending = max_pending
+        # Default deadline for each job, counted from submission
+        self.timeout = timeout
+        self._pending = deque()
+        self._running = set()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._shutdown = False
+
+    def submit(self, fn, *args, timeout=None, **kwargs):
+        job = Job(fn, args, kwargs, self.timeout if timeout is None else timeout)
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("JobExecutor has been shut down")
+            while len(self._pending) >= self.max_pending:
+                dropped = self._pending.popleft()
+                dropped.cancel()
+                logger.warning("Job queue full, dropped the oldest pending job")
+            self._pending.append(job)
+            if len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, name=f"npcgen-job-{len(self._threads)}", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            self._cond.notify()
+        return job
+
+    def cancel_all(self):
+        # Drop every queued job and cancel the running ones, which stop at
+        # their next checkpoint
+        with self._cond:
+            jobs, self._pending = list(self._pending) + list(self._running), deque()
+        for job in jobs:
+            job.cancel()
+
+    def shutdown(self, wait=False):
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+        self.cancel_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._shutdown:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                job = self._pending.popleft()
+                self._running.add(job)
+            try:
+                job.run()
+            finally:
+                with self._cond:
+                    self._running.discard(job)
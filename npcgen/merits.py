@@ -0,0 +1,76 @@
+import random
+
+from npcgen.catalog import AdvantageCatalog
+from npcgen.constraints import BACKGROUND
+
+
+class MeritsMixin:
+    # Merits, flaws and backgrounds for the splats that draw them from
+    # 5eMerits.json and 5eBackgrounds.json (Garou and Hunter). Engines using
+    # it define advantage_count and flaw_count among their importance_values.
+    def validate_json_data(self):
+        super().validate_json_data()
+        if "Merits" not in self.merits_data:
+            raise KeyError("'Merits' key not found in merits data")
+        if "Backgrounds" not in self.backgrounds_data:
+            raise KeyError("'Backgrounds' key not found in backgrounds data")
+
+    def build_tables(self):
+        super().build_tables()
+        self.merit_catalog = AdvantageCatalog(self.merits_data["Merits"])
+        self.background_catalog = AdvantageCatalog(self.backgrounds_data["Backgrounds"])
+
+    def constraint_targets(self):
+        targets = super().constraint_targets()
+        targets.update((name, (BACKGROUND, 1)) for name in self.background_catalog.by_name)
+        return targets
+
+    def check_constraints(self, constraints, params, tier):
+        super().check_constraints(constraints, params, tier)
+        importance = params.importance or "the default importance"
+        backgrounds = constraints.required(BACKGROUND)
+        if len(backgrounds) > self.advantage_count[tier]:
+            raise ValueError(f"{importance} has {self.advantage_count[tier]} backgrounds, fewer than the "
+                             f"{len(backgrounds)} required")
+
+    def generate_merits_and_flaws(self, importance, rng=random):
+        tier = self.tier(importance)
+        total_merits = self.advantage_count[tier]
+        total_flaws = self.flaw_count[tier]
+
+        selected_merits = self.merit_catalog.advantages.sample(total_merits, rng)
+        selected_flaws = self.merit_catalog.flaws.sample(total_flaws, rng)
+
+        return {
+            "Merits": selected_merits,
+            "Flaws": selected_flaws
+        }
+
+    def generate_backgrounds(self, importance, rng=random, constraints=None):
+        total_backgrounds = self.advantage_count[self.tier(importance)]
+
+        selected_backgrounds = {}
+        exclude = ()
+        if constraints is not None:
+            # Required backgrounds count towards the total and are not drawn again
+            required = constraints.required(BACKGROUND)
+            for name in required:
+                advantage = self.background_catalog.by_name[name]
+                selected_backgrounds[advantage["name"]] = advantage.get("cost", 1)
+            total_backgrounds -= len(required)
+            exclude = constraints.excluded(BACKGROUND) | set(required)
+        for advantage in self.background_catalog.pick_per_group(total_backgrounds, rng, exclude):
+            selected_backgrounds[advantage["name"]] = advantage.get("cost", 1)
+
+        return selected_backgrounds
+
+    def format_section(self, key, value, lines):
+        if key == "Merits and Flaws":
+            lines.append("Merits:\n")
+            for merit in value["Merits"]:
+                lines.append(f"  {merit['name']}: {merit.get('desc', '')}\n")
+            lines.append("Flaws:\n")
+            for flaw in value["Flaws"]:
+                lines.append(f"  {flaw['name']}: {flaw.get('desc', '')}\n")
+        else:
+            super().format_section(key, value, lines)
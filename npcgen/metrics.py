@@ -0,0 +1,132 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+
+# Upper bounds in seconds of the latency buckets, 1 us to 1 s in 1-2-5 steps
+BUCKETS = tuple(m * 10.0 ** e for e in range(-6, 0) for m in (1, 2, 5)) + (1.0,)
+
+# What engine.stage() hands out while instrumentation is off
+NO_STAGE = nullcontext()
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q):
+        # Interpolated inside the bucket holding the q-th observation
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(BUCKETS, self.counts):
+            if count and seen + count >= rank:
+                return min(lower + (bound - lower) * (rank - seen) / count, self.max)
+            seen += count
+            lower = bound
+        return self.max
+
+
+class _Stage:
+    __slots__ = ("metrics", "key", "start")
+
+    def __init__(self, metrics, key):
+        self.metrics = metrics
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.key, time.perf_counter() - self.start)
+
+
+class Metrics:
+    # Latency histograms per (splat, stage). Hand one to an engine to turn
+    # instrumentation on; engines without one skip it entirely.
+    def __init__(self):
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def time(self, splat, stage):
+        return _Stage(self, (splat, stage))
+
+    def observe(self, key, seconds):
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def merge(self, other):
+        # Fold in histograms recorded elsewhere, e.g. by a worker process
+        with self._lock:
+            for key, histogram in other.histograms.items():
+                self.histograms.setdefault(key, Histogram()).merge(histogram)
+
+    def drain(self):
+        # Hand over everything recorded so far and start afresh
+        with self._lock:
+            drained = Metrics()
+            drained.histograms, self.histograms = self.histograms, {}
+        return drained
+
+    def __getstate__(self):
+        return self.histograms
+
+    def __setstate__(self, histograms):
+        self.histograms = histograms
+        self._lock = threading.Lock()
+
+    def openmetrics(self):
+        lines = [
+            "# TYPE npcgen_stage_seconds histogram",
+            "# UNIT npcgen_stage_seconds seconds",
+            "# HELP npcgen_stage_seconds Time spent in each character generation stage.",
+        ]
+        for (splat, stage), histogram in sorted(self.histograms.items()):
+            labels = f'splat="{splat}",stage="{stage}"'
+            cumulative = 0
+            for bound, count in zip(BUCKETS, histogram.counts):
+                cumulative += count
+                lines.append(f'npcgen_stage_seconds_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            lines.append(f'npcgen_stage_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"npcgen_stage_seconds_count{{{labels}}} {histogram.count}")
+            lines.append(f"npcgen_stage_seconds_sum{{{labels}}} {histogram.sum:.9f}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        lines = [f"{'splat':<9} {'stage':<17} {'count':>9} {'mean us':>9} {'p50 us':>9} "
+                 f"{'p95 us':>9} {'p99 us':>9} {'max us':>9} {'share':>6}"]
+        totals = {}
+        for (splat, stage), histogram in self.histograms.items():
+            if stage != "total":
+                totals[splat] = totals.get(splat, 0.0) + histogram.sum
+        for (splat, stage), histogram in sorted(self.histograms.items()):
+            if not histogram.count:
+                continue
+            # No share without any time to divide, e.g. only zero-length stages
+            share = "" if stage == "total" or not totals[splat] else f"{histogram.sum / totals[splat]:6.1%}"
+            lines.append(
+                f"{splat:<9} {stage:<17} {histogram.count:>9} {histogram.sum / histogram.count * 1e6:>9.1f} "
+                f"{histogram.quantile(0.5) * 1e6:>9.1f} {histogram.quantile(0.95) * 1e6:>9.1f} "
+                f"{histogram.quantile(0.99) * 1e6:>9.1f} {histogram.max * 1e6:>9.1f} {share:>6}"
+            )
+        return "\n".join(lines) + "\n"
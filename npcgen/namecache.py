@@ -0,0 +1,158 @@
+import logging
+import os
+import queue
+import random
+import sqlite3
+import threading
+
+from npcgen import names
+from npcgen.engine import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(CACHE_DIR, "names.sqlite3")
+
+# Male first names, female first names and surnames are pooled separately
+KINDS = ("m", "f", "s")
+
+
+class NamePool:
+    # Per-culture pool of name parts kept in sqlite. Full names are recombined
+    # locally on every draw, so a warm pool never touches the network.
+    def __init__(self, path=DEFAULT_DB_PATH, fetch=names.fetch_name_parts, target=24, delay=0.0, blocking=True):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # fetch(usage, gender) -> (first names, surname)
+        self.fetch = fetch
+        # Parts of each kind to collect per culture before prefetching stops
+        self.target = target
+        # Extra pause between prefetch requests, on top of the client's rate limit
+        self.delay = delay
+        # Whether a cold culture waits on the API or answers from the offline
+        # corpus while the prefetcher warms it up
+        self.blocking = blocking
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS names ("
+            "usage TEXT NOT NULL, kind TEXT NOT NULL, name TEXT NOT NULL, "
+            "PRIMARY KEY (usage, kind, name)) WITHOUT ROWID"
+        )
+        self._db.commit()
+        self._pools = {}
+
+        self._queue = queue.Queue()
+        self._queued = set()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def pool(self, usage):
+        pool = self._pools.get(usage)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(usage)
+                if pool is None:
+                    pool = {kind: [] for kind in KINDS}
+                    for kind, name in self._db.execute("SELECT kind, name FROM names WHERE usage = ?", (usage,)):
+                        pool[kind].append(name)
+                    self._pools[usage] = pool
+        return pool
+
+    def add(self, usage, gender, first_names, surname):
+        pool = self.pool(usage)
+        rows = [(usage, gender, name) for name in first_names] + [(usage, "s", surname)]
+        added = 0
+        with self._lock:
+            for row in rows:
+                if row[2] and self._db.execute("INSERT OR IGNORE INTO names VALUES (?, ?, ?)", row).rowcount:
+                    pool[row[1]].append(row[2])
+                    added += 1
+            self._db.commit()
+        return added
+
+    def is_full(self, usage):
+        pool = self.pool(usage)
+        return all(len(pool[kind]) >= self.target for kind in KINDS)
+
+    def fill_once(self, usage):
+        # Ask for the gender that is shorter on first names
+        pool = self.pool(usage)
+        gender = "m" if len(pool["m"]) <= len(pool["f"]) else "f"
+        first_names, surname = self.fetch(usage, gender)
+        return self.add(usage, gender, first_names, surname)
+
+    def draw(self, culture, rng=random):
+        pool = self.pool(names.CULTURE_USAGE.get(culture, ""))
+        gender = rng.choice(["m", "f"])
+        first_names = pool[gender] or pool["f" if gender == "m" else "m"]
+        if not first_names:
+            return None
+        first_name = rng.choice(first_names)
+        if not pool["s"]:
+            return first_name
+        return f"{first_name} {rng.choice(pool['s'])}"
+
+    def prefetch(self, *cultures):
+        for culture in cultures:
+            usage = names.CULTURE_USAGE.get(culture, "")
+            if self.is_full(usage):
+                continue
+            with self._lock:
+                if usage in self._queued:
+                    continue
+                self._queued.add(usage)
+            self._queue.put(usage)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="name-prefetch", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            usage = self._queue.get()
+            if usage is None:
+                break
+            try:
+                # Give up on cultures that stop yielding new names
+                misses = 0
+                while not self.is_full(usage) and misses < 3 and not self._stop.is_set():
+                    misses = 0 if self.fill_once(usage) else misses + 1
+                    self._stop.wait(self.delay)
+            except Exception as e:
+                logger.error(f"Name prefetch failed for usage '{usage}': {e}")
+            finally:
+                with self._lock:
+                    self._queued.discard(usage)
+
+    def __call__(self, culture, rng=random):
+        # Name provider for the engines: draw locally, top the pool up in the
+        # background, and only block on the API while a culture is still cold
+        if self._thread is not None:
+            self.prefetch(culture)
+        for candidate in (culture, "English"):
+            name = self.draw(candidate, rng)
+            if name is None:
+                if not self.blocking:
+                    break
+                try:
+                    self.fill_once(names.CULTURE_USAGE.get(candidate, ""))
+                except Exception as e:
+                    logger.error(f"Error in name generation: {e}")
+                name = self.draw(candidate, rng)
+            if name is not None:
+                return name
+        return names.offline_name(culture, rng)
+
+    def close(self):
+        self.stop()
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,166 @@
+import contextvars
+import logging
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from dotenv import find_dotenv, load_dotenv
+from requests.adapters import HTTPAdapter
+
+from npcgen import jobs
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = "https://www.behindthename.com/api/random.json"
+
+
+def get_api_key():
+    # Look for .env from the working directory, i.e. the generator's own folder
+    load_dotenv(find_dotenv(usecwd=True))
+    API_KEY = os.getenv('BEHIND_THE_NAME')
+    if not API_KEY:
+        logger.error("API key for Behind the Name is not set.")
+        raise ValueError("API key is missing. Please set it in the .env file.")
+    return API_KEY
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        # rate tokens per second, at most capacity banked for bursts
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            jobs.sleep(wait)
+
+
+class NameClient:
+    # Behind the Name client shared by all generators: one keep-alive session,
+    # the key read once, a token bucket in front of every request and
+    # exponential backoff on 429/5xx responses.
+    def __init__(self, api_key=None, rate=2.0, burst=4, max_in_flight=4, retries=4, backoff=1.0, timeout=10):
+        self.api_key = api_key or get_api_key()
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate, burst)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="name-client")
+
+    def random_names(self, usage, gender, number=2, surname=True):
+        params = {
+            "key": self.api_key,
+            "gender": gender,
+            "randomsurname": "yes" if surname else "no",
+            "number": number
+        }
+        if usage:
+            params["usage"] = usage
+
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            logger.debug(f"Sending request with params: {params}")
+            # Never wait on the socket past the deadline of the calling job,
+            # and report a timeout caused by that deadline as such
+            try:
+                response = self.session.get(BASE_URL, params=params, timeout=jobs.bounded_timeout(self.timeout))
+            except requests.Timeout:
+                jobs.checkpoint()
+                raise
+            logger.debug(f"Response status code: {response.status_code}")
+
+            if response.status_code == 429 or response.status_code >= 500:
+                if attempt == self.retries:
+                    break
+                retry_after = response.headers.get("Retry-After", "")
+                delay = float(retry_after) if retry_after.isdigit() else self.backoff * 2 ** attempt
+                logger.warning(f"API returned {response.status_code}, retrying in {delay:.1f}s")
+                jobs.sleep(delay)
+                continue
+            break
+
+        response.raise_for_status()
+        data = response.json()
+        if "names" not in data:
+            raise ValueError(f"Unexpected response format: {data}")
+        return [name.strip() for name in data["names"]]
+
+    def fetch_name_parts(self, usage, gender, number=6):
+        # One request yields several given names of one gender plus a surname
+        names = self.random_names(usage, gender, number=number)
+        if len(names) < 2:
+            raise ValueError(f"Unexpected response format: {names}")
+        *first_names, surname = names
+        return first_names, surname
+
+    def fetch_many(self, requests_args):
+        # Run fetch_name_parts for many (usage, gender) pairs concurrently,
+        # keeping submission order. Failed requests come back as None. Each
+        # request runs in a copy of the caller's context, so the calling
+        # job's deadline and cancellation apply to it as well.
+        def fetch(args):
+            try:
+                return self.fetch_name_parts(*args)
+            except Exception as e:
+                logger.error(f"API request error: {e}")
+                return None
+        jobs.checkpoint()
+        futures = [self._executor.submit(contextvars.copy_context().run, fetch, args) for args in requests_args]
+        try:
+            return [future.result() for future in futures]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    def fetch_names(self, usage, n, max_requests=20, rng=random):
+        # Build n full names from a handful of requests by recombining the
+        # returned first names and surnames locally
+        count = min(max_requests, max(1, math.ceil(n / 5)))
+        genders = ["m", "f"] * math.ceil(count / 2)
+        first_names = {"m": [], "f": []}
+        surnames = []
+        for gender, parts in zip(genders, self.fetch_many([(usage, g) for g in genders[:count]])):
+            if parts:
+                first_names[gender].extend(parts[0])
+                surnames.append(parts[1])
+
+        genders = [g for g in first_names if first_names[g]]
+        if not genders or not surnames:
+            return []
+        return [f"{rng.choice(first_names[g])} {rng.choice(surnames)}" for g in (rng.choice(genders) for _ in range(n))]
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def shared_client():
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = NameClient()
+        return _shared_client
@@ -0,0 +1,126 @@
+import inspect
+import logging
+import random
+import threading
+
+import requests
+
+from npcgen.nameclient import shared_client
+
+logger = logging.getLogger(__name__)
+
+# Behind the Name usage codes for each culture offered in the GUIs
+CULTURE_USAGE = {
+    "New World Mythology": "amem", "Ancient Celtic": "cela", "Celtic Mythology": "celm", "Ancient Egyptian": "egya", "Egyptian Mythology": "egym", "Anglo-Saxon": "enga", "Ancient Germanic": "gmca", "Ancient Greek": "grea", "Greek Mythology": "grem", "Hindu Mythology": "indm", "Arthurian Romance": "litk", "Ancient Near Eastern": "neaa", "Near Eastern Mythology": "neam", "Ancient Roman": "roma", "Roman Mythology": "romm", "Ancient Scandinavian": "scaa", "Norse Mythology": "scam", "Slavic Mythology": "slam", "African": "afr", "Afrikaans": "afk", "Akan": "aka", "Albanian": "alb", "Algonquin": "alg", "American": "usa", "Amharic": "amh", "Apache": "apa", "Arabic": "ara", "Armenian": "arm", "Assamese": "asm", "Asturian": "ast", "Avar": "ava", "Aymara": "aym", "Azerbaijani": "aze", "Balinese": "bal", "Bashkir": "bsh", "Basque": "bas", "Belarusian": "bel", "Bengali": "ben", "Berber": "ber", "Bhutanese": "bhu", "Bosnian": "bos", "Breton": "bre", "Bulgarian": "bul", "Burmese": "bur", "Catalan": "cat", "Chamorro": "cha", "Chechen": "che", "Cherokee": "chk", "Chewa": "cew", "Cheyenne": "chy", "Chinese": "chi", "Choctaw": "cht", "Circassian": "cir", "Comanche": "com", "Comorian": "cmr", "Cornish": "cor", "Corsican": "crs", "Cree": "cre", "Croatian": "cro", "Czech": "cze", "Dagestani": "dgs", "Danish": "dan", "Dargin": "drg", "Dhivehi": "dhi", "Dutch": "dut", "English": "eng", "Esperanto": "esp", "Estonian": "est", "Ethiopian": "eth", "Ewe": "ewe", "Gluttakh": "fntsg", "Monstrall": "fntsm", "Orinami": "fntso", "Romanto": "fntsr", "Simitiq": "fntss", "Tsang": "fntst", "Xalaxxi": "fntsx", "Faroese": "fae", "Fijian": "fij", "Filipino": "fil", "Finnish": "fin", "Flemish": "fle", "French": "fre", "Frisian": "fri", "Fula": "ful", "Ga": "gaa", "Galician": "gal", "Ganda": "gan", "Georgian": "geo", "German": "ger", "Greek": "gre", "Greenlandic": "grn", "Guarani": "gua", "Gujarati": "guj", "Hausa": "hau", "Hawaiian": "haw", "Hindi": "hin", "Hmong": "hmo", "Hungarian": "hun", "Ibibio": "ibi", "Icelandic": "ice", "Igbo": "igb", "Indian": "ind", "Indonesian": "ins", "Ingush": "ing", "Inuit": "inu", "Irish": "iri", "Iroquois": "iro", "Italian": "ita", "Japanese": "jap", "Javanese": "jav", "Jèrriais": "jer", "Kannada": "kan", "Kazakh": "kaz", "Khmer": "khm", "Kiga": "kig", "Kikuyu": "kik", "Kongo": "kon", "Korean": "kor", "Kurdish": "kur", "Kyrgyz": "kyr", "Lao": "lao", "Latvian": "lat", "Limburgish": "lim", "Lithuanian": "lth", "Luhya": "luh", "Luo": "luo", "Macedonian": "mac", "Maguindanao": "mag", "Malay": "mly", "Malayalam": "mlm", "Maltese": "mal", "Manx": "man", "Maori": "mao", "Mapuche": "map", "Marathi": "mrt", "Mayan": "may", "Mbundu": "mbu", "Mongolian": "mon", "Mwera": "mwe", "Nahuatl": "nah", "Navajo": "nav", "Ndebele": "nde", "Nepali": "nep", "Norman": "nrm", "Norwegian": "nor", "Nuu-chah-nulth": "nuu", "Occitan": "occ", "Odia": "odi", "Ojibwe": "oji", "Oneida": "one", "Oromo": "oro", "Ossetian": "oss", "Pashto": "pas", "Persian": "per", "Picard": "pcd", "Pintupi": "pin", "Polish": "pol", "Portuguese": "por", "Powhatan": "pow", "Punjabi": "pun", "Quechua": "que", "Rapa Nui": "rap", "Romanian": "rmn", "Russian": "rus", "Sami": "sam", "Samoan": "smn", "Sardinian": "sar", "Scots": "sct", "Scottish": "sco", "Seneca": "sen", "Serbian": "ser", "Shawnee": "sha", "Shona": "sho", "Siksika": "sik", "Sinhalese": "sin", "Sioux": "sio", "Slovak": "slk", "Slovene": "sln", "Somali": "som", "Sorbian": "sor", "Sotho": "sot", "Spanish": "spa", "Sundanese": "sun", "Swahili": "swa", "Swazi": "swz", "Swedish": "swe", "Tagalog": "tag", "Tahitian": "tah", "Tajik": "taj", "Tamil": "tam", "Tatar": "tat", "Tausug": "tau", "Telugu": "tel", "Thai": "tha", "Sicilian": "sic", "Pet": "pets", "Indigenous American": "ame", "Coptic": "cop", "Hebrew": "heb", "Jewish": "jew", "Slavic": "sla", "Indigenous Australian": "aus", "Mohawk": "moh", "Low German": "sax", "History": "hist", "Theology": "theo", "Various": "vari", "Mythology": "myth", "Biblical (All)": "bibl", "Mormon": "morm", "Astronomy": "astr", "Literature": "lite", "Popular Culture": "popu", "Medieval": "medi", "Ancient": "anci", "Tibetan": "tib", "Tongan": "ton", "Tooro": "too", "Tswana": "tsw", "Tuareg": "tua", "Tumbuka": "tum", "Tupi": "tup", "Turkish": "tur", "Turkmen": "tkm", "Ukrainian": "ukr", "Urdu": "urd", "Urhobo": "urh", "Uyghur": "uyg", "Uzbek": "uzb", "Vietnamese": "vie", "Walloon": "wln", "Welsh": "wel", "Xhosa": "xho", "Yao": "yao", "Yolngu": "yol", "Yoruba": "yor", "Zapotec": "zap", "Zulu": "zul"
+}
+
+
+def get_name_from_api(culture, rng=random):
+    client = shared_client()
+
+    usage = CULTURE_USAGE.get(culture, "")
+    gender = rng.choice(["m", "f"])
+
+    try:
+        names = client.random_names(usage, gender, number=2)
+        if len(names) >= 2:
+            first_name = names[0]
+            last_name = names[1]
+            return f"{first_name} {last_name}".strip()
+        elif len(names) == 1:
+            return names[0]  # Return single name if only one is provided
+        else:
+            logger.error("Unexpected response format")
+            return "Name generation failed"
+    except requests.exceptions.RequestException as e:
+        logger.error(f"API request error: {e}")
+        return "Name generation failed"
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        return "Name generation failed"
+
+
+def generate_name(culture, rng=random):
+    logger.info(f"Generating name for culture: {culture}")
+    try:
+        name = get_name_from_api(culture, rng)
+        if name == "Name generation failed":
+            raise ValueError("Name generation failed")
+        logger.info(f"Generated name: {name}")
+        return name
+    except Exception as e:
+        logger.error(f"Error in name generation: {e}")
+        # Fallback to default culture or random name
+        default_culture = "English"
+        logger.info(f"Falling back to default culture: {default_culture}")
+        name = get_name_from_api(default_culture, rng)
+        return name if name != "Name generation failed" else offline_name(culture, rng)
+
+
+def generate_names(culture, n, rng=random):
+    # n names for one culture from a few concurrent API requests instead of
+    # a round trip each; any shortfall falls back like generate_name
+    try:
+        drawn = shared_client().fetch_names(CULTURE_USAGE.get(culture, ""), n, rng=rng)
+    except Exception as e:
+        logger.error(f"API request error: {e}")
+        drawn = []
+    return drawn + [generate_name(culture, rng) for _ in range(n - len(drawn))]
+
+
+def takes_rng(provider):
+    # Whether a provider accepts rng=, as the bundled ones do. Plain
+    # culture -> name callables are called without it.
+    try:
+        parameters = inspect.signature(provider).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(p.name == "rng" or p.kind is inspect.Parameter.VAR_KEYWORD for p in parameters)
+
+
+def draw_names(provider, culture, n, rng=random):
+    # n names from any provider. The API backend batches its requests; the
+    # cache and offline backends draw locally after at most one fill.
+    if provider is generate_name:
+        return generate_names(culture, n, rng)
+    if rng is random or not takes_rng(provider):
+        return [provider(culture) for _ in range(n)]
+    return [provider(culture, rng=rng) for _ in range(n)]
+
+
+def fetch_name_parts(usage, gender, number=6):
+    # One request yields several given names of one gender plus a surname,
+    # which the name cache stores separately and recombines later
+    return shared_client().fetch_name_parts(usage, gender, number=number)
+
+
+def offline_name(culture, rng=random):
+    # Last resort when the API is unreachable: a name from the bundled corpus
+    return name_provider("offline")(culture, rng)
+
+
+NAME_BACKENDS = ("api", "cache", "offline")
+
+# Backend name -> the provider shared by every engine in this process
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def name_provider(backend):
+    # The name provider for a backend name, built once per process so that
+    # engines for different splats draw from one name cache; the cache and
+    # offline backends are imported lazily since both import this module
+    if backend == "api":
+        return generate_name
+    if backend not in ("cache", "offline"):
+        raise ValueError(f"Unknown name backend '{backend}', expected one of {', '.join(NAME_BACKENDS)}")
+    with _providers_lock:
+        if backend not in _providers:
+            if backend == "cache":
+                from npcgen.namecache import NamePool
+                _providers[backend] = NamePool()
+                _providers[backend].start()
+            else:
+                from npcgen.offlinenames import OfflineNames
+                _providers[backend] = OfflineNames()
+        return _providers[backend]
@@ -0,0 +1,210 @@
+import array
+import hashlib
+import logging
+import mmap
+import os
+import random
+import struct
+import sys
+from bisect import bisect_right
+
+from npcgen import names
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+SOURCE_PATH = os.path.join(DATA_DIR, "names.txt")
+DEFAULT_BIN_PATH = os.path.join(DATA_DIR, "names.bin")
+
+# names.bin layout, all integers little-endian u32:
+#   header   magic, version, source digest, table count, name count, blob size
+#   index    (usage, kind, first name index, name count) per table
+#   starts   byte offset of every name in the blob, plus the end offset
+#   weights  running weight total inside each table, one per name
+#   blob     UTF-8 names back to back
+MAGIC = b"NPCN"
+VERSION = 1
+HEADER = struct.Struct("<4sI8sIII")
+INDEX_ENTRY = struct.Struct("<8s1s3xII")
+
+
+def source_digest(path=SOURCE_PATH):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).digest()[:8]
+
+
+def parse_corpus(path=SOURCE_PATH):
+    # Returns {(usage, kind): [(name, weight), ...]} with aliases resolved
+    tables = {}
+    aliases = {}
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.rstrip("\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            fields = line.split("\t")
+            if fields[0] == "alias" and len(fields) == 3:
+                aliases[fields[1]] = fields[2]
+                continue
+            if len(fields) != 3 or fields[1] not in ("m", "f", "s"):
+                raise ValueError(f"{path}:{line_number}: expected '<usage>\\t<m|f|s>\\t<names>'")
+            entries = tables.setdefault((fields[0], fields[1]), [])
+            for entry in fields[2].split(","):
+                name, _, weight = entry.strip().partition(":")
+                entries.append((name, int(weight or 1)))
+
+    for usage, target in aliases.items():
+        for kind in ("m", "f", "s"):
+            if (target, kind) in tables:
+                tables[(usage, kind)] = tables[(target, kind)]
+    return tables
+
+
+def pack_corpus(tables, digest):
+    index = []
+    starts = array.array("I")
+    weights = array.array("I")
+    blob = bytearray()
+    # Aliased tables share one copy of their names
+    packed = {}
+    for (usage, kind), entries in sorted(tables.items()):
+        key = id(entries)
+        if key not in packed:
+            packed[key] = len(weights)
+            total = 0
+            for name, weight in entries:
+                starts.append(len(blob))
+                blob += name.encode("utf-8")
+                total += weight
+                weights.append(total)
+        index.append(INDEX_ENTRY.pack(usage.encode("ascii"), kind.encode("ascii"), packed[key], len(entries)))
+    starts.append(len(blob))
+    if sys.byteorder == "big":
+        starts.byteswap()
+        weights.byteswap()
+
+    header = HEADER.pack(MAGIC, VERSION, digest, len(index), len(weights), len(blob))
+    return header + b"".join(index) + starts.tobytes() + weights.tobytes() + bytes(blob)
+
+
+def is_current(buffer, digest):
+    # True if buffer holds a whole names.bin of this version, packed from a
+    # source with digest (from any source when digest is None)
+    magic, version, stored, table_count, name_count, blob_size = HEADER.unpack_from(buffer)
+    size = HEADER.size + INDEX_ENTRY.size * table_count + 4 * (2 * name_count + 1) + blob_size
+    return (magic == MAGIC and version == VERSION and (digest is None or stored == digest)
+            and len(buffer) == size)
+
+
+def build(source=SOURCE_PATH, path=DEFAULT_BIN_PATH):
+    data = pack_corpus(parse_corpus(source), source_digest(source))
+    # Write beside the target and swap it in: workers mapping the old file
+    # keep reading it intact, and none ever maps a half-written one
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    logger.info(f"Packed {source} into {path} ({len(data)} bytes)")
+    return data
+
+
+class OfflineNames:
+    # Name provider that never touches the network: weighted draws from the
+    # bundled corpus, memory-mapped from names.bin. A missing or stale
+    # names.bin is rebuilt from names.txt on first use.
+    def __init__(self, path=DEFAULT_BIN_PATH, source=SOURCE_PATH):
+        self._file = None
+        self._buffer = self._open(path, source)
+        table_count, name_count, blob_size = HEADER.unpack_from(self._buffer)[3:]
+
+        offset = HEADER.size
+        self._tables = {}
+        for _ in range(table_count):
+            usage, kind, first, count = INDEX_ENTRY.unpack_from(self._buffer, offset)
+            self._tables[(usage.rstrip(b"\0").decode("ascii"), kind.decode("ascii"))] = (first, count)
+            offset += INDEX_ENTRY.size
+
+        view = memoryview(self._buffer)
+        starts = view[offset:offset + 4 * (name_count + 1)]
+        offset += 4 * (name_count + 1)
+        weights = view[offset:offset + 4 * name_count]
+        offset += 4 * name_count
+        if sys.byteorder == "little":
+            self._starts = starts.cast("I")
+            self._weights = weights.cast("I")
+        else:
+            self._starts = array.array("I", starts.tobytes())
+            self._weights = array.array("I", weights.tobytes())
+            self._starts.byteswap()
+            self._weights.byteswap()
+        self._blob = view[offset:offset + blob_size]
+
+    def _open(self, path, source):
+        digest = source_digest(source) if os.path.exists(source) else None
+        buffer = None
+        try:
+            with open(path, "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if is_current(buffer, digest):
+                self._file = buffer
+                return buffer
+        except (OSError, ValueError, struct.error):
+            pass
+        # A stale, truncated or corrupt file: unmap it before rebuilding
+        if buffer is not None:
+            buffer.close()
+
+        logger.info(f"Rebuilding offline name tables from {source}")
+        try:
+            return build(source, path)
+        except OSError as e:
+            # Read-only install: keep the packed tables in memory for this run
+            logger.warning(f"Could not write {path}: {e}")
+            return pack_corpus(parse_corpus(source), digest)
+
+    def usages(self):
+        return sorted({usage for usage, _ in self._tables})
+
+    def draw_part(self, usage, kind, rng=random):
+        table = self._tables.get((usage, kind))
+        if table is None:
+            return None
+        first, count = table
+        total = self._weights[first + count - 1]
+        i = bisect_right(self._weights, rng.randrange(total), first, first + count)
+        return bytes(self._blob[self._starts[i]:self._starts[i + 1]]).decode("utf-8")
+
+    def draw(self, culture, rng=random):
+        usage = names.CULTURE_USAGE.get(culture, "")
+        gender = rng.choice(["m", "f"])
+        first_name = self.draw_part(usage, gender, rng) or self.draw_part(usage, "f" if gender == "m" else "m", rng)
+        if first_name is None:
+            return None
+        surname = self.draw_part(usage, "s", rng)
+        return f"{first_name} {surname}" if surname else first_name
+
+    def prefetch(self, *cultures):
+        # Everything is local already; kept so the GUIs can swap providers
+        pass
+
+    def __call__(self, culture, rng=random):
+        name = self.draw(culture, rng) or self.draw("English", rng)
+        return name or "John Doe"
+
+    def close(self):
+        self._starts = self._weights = self._blob = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if sys.argv[1:] != ["build"]:
+        sys.exit("usage: python -m npcgen.offlinenames build")
+    build()
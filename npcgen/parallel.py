@@ -0,0 +1,78 @@
+import logging
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+from npcgen.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+# Characters per task. Fixed so that a seed gives the same characters no
+# matter how many workers share the work.
+CHUNK_SIZE = 1000
+
+# Engine built once in each worker process by _init_worker
+_engine = None
+
+
+def _init_worker(engine_class, data_dir, name_backend, collect_metrics):
+    global _engine
+    _engine = engine_class(data_dir=data_dir, name_provider=name_backend,
+                           metrics=Metrics() if collect_metrics else None)
+
+
+def _generate_chunk(n, params, seed):
+    characters = _engine.generate_many(n, params, seed=seed)
+    # Ship this chunk's stage timings back with it
+    return characters, _engine.metrics.drain() if _engine.metrics is not None else None
+
+
+def chunk_seeds(n, seed, chunk_size=CHUNK_SIZE):
+    # One (count, SeedSequence) per chunk, spawned in order from the master seed
+    counts = [min(chunk_size, n - start) for start in range(0, n, chunk_size)]
+    return list(zip(counts, np.random.SeedSequence(seed).spawn(len(counts))))
+
+
+def iter_parallel(engine_class, n, params, seed=None, workers=None, chunk_size=CHUNK_SIZE,
+                  name_backend="offline", data_dir=None, metrics=None):
+    # Yield n characters generated across a process pool, in order, one chunk
+    # at a time. Each chunk draws from its own stream spawned from seed, so
+    # re-running with the same seed yields the same characters. Only the
+    # offline name backend is reproducible; the API and cache backends
+    # depend on what the network returns. Stage timings from the workers
+    # are merged into metrics when one is given.
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+        logger.info(f"Generating {n} characters with seed {seed}")
+    chunks = chunk_seeds(n, seed, chunk_size)
+    workers = min(workers or os.cpu_count() or 1, len(chunks)) or 1
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(engine_class, data_dir, name_backend, metrics is not None)) as executor:
+        # Keep a couple of chunks per worker in flight, so a slow consumer
+        # holds back generation instead of piling up finished chunks
+        pending = deque()
+        chunks = iter(chunks)
+        try:
+            for count, chunk_seed in islice(chunks, 2 * workers):
+                pending.append(executor.submit(_generate_chunk, count, params, chunk_seed))
+            while pending:
+                characters, chunk_metrics = pending.popleft().result()
+                if chunk_metrics is not None:
+                    metrics.merge(chunk_metrics)
+                for count, chunk_seed in islice(chunks, 1):
+                    pending.append(executor.submit(_generate_chunk, count, params, chunk_seed))
+                yield from characters
+        finally:
+            # Drop pending chunks if the caller stops early
+            for future in pending:
+                future.cancel()
+
+
+def generate_parallel(engine_class, n, params, seed=None, workers=None, chunk_size=CHUNK_SIZE,
+                      name_backend="offline", data_dir=None, metrics=None):
+    return list(iter_parallel(engine_class, n, params, seed=seed, workers=workers, chunk_size=chunk_size,
+                              name_backend=name_backend, data_dir=data_dir, metrics=metrics))
@@ -0,0 +1,254 @@
+import threading
+from collections.abc import Mapping
+
+# How a top-level field is stored: trait dots in the fixed-width dots
+# block, or anything else in the ID stream
+ATTRIBUTES = "attributes"
+SKILLS = "skills"
+VALUE = "value"
+
+# Low two bits of a value's first varint in the ID stream
+ATOM, LIST, DICT, TEXT = 0, 1, 2, 3
+
+# Largest dot count the one-byte trait slots hold
+MAX_DOTS = 255
+
+
+def freeze(value):
+    # Hashable stand-in for a JSON-like value. Containers and scalars other
+    # than str and int are tagged, so True, 1 and 1.0 stay apart.
+    if type(value) is str or type(value) is int:
+        return value
+    if isinstance(value, dict):
+        return 0, tuple((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return 1, tuple(freeze(item) for item in value)
+    return 2, type(value).__name__, value
+
+
+def thaw(frozen):
+    # A fresh copy of the value freeze was given, so callers may edit it
+    if type(frozen) is not tuple:
+        return frozen
+    if frozen[0] == 0:
+        return {key: thaw(item) for key, item in frozen[1]}
+    if frozen[0] == 1:
+        return [thaw(item) for item in frozen[1]]
+    return frozen[2]
+
+
+def write_varint(out, number):
+    while number > 0x7F:
+        out.append(number & 0x7F | 0x80)
+        number >>= 7
+    out.append(number)
+
+
+def read_varint(data, pos):
+    number = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        number |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return number, pos
+        shift += 7
+
+
+class RecordCodec:
+    # Packs characters into CharacterRecords for one ruleset. Attribute and
+    # skill dots go into one byte per trait in ruleset order. Names, catalog
+    # entries (merits, flaws, talismans, edges, ...) and every other value are
+    # interned once per codec and stored as varint IDs, so a hundred thousand
+    # characters share one copy of each.
+    def __init__(self, attribute_names, skill_names):
+        self.attribute_names = tuple(attribute_names)
+        self.skill_names = tuple(skill_names)
+        self.attribute_count = len(self.attribute_names)
+        self.skill_indexes = {name: i for i, name in enumerate(self.skill_names)}
+        self.empty_dots = bytes(len(self.attribute_names) + len(self.skill_names))
+        # ID -> frozen value, and back
+        self.values = []
+        self.ids = {}
+        # Layout ID -> ((field, kind), ...), and back
+        self.layouts = []
+        self.layout_ids = {}
+        self._lock = threading.Lock()
+
+    def intern(self, frozen, table, ids):
+        id_ = ids.get(frozen)
+        if id_ is None:
+            with self._lock:
+                id_ = ids.get(frozen)
+                if id_ is None:
+                    id_ = len(table)
+                    table.append(frozen)
+                    ids[frozen] = id_
+        return id_
+
+    def atom(self, value):
+        return self.intern(freeze(value), self.values, self.ids)
+
+    def encode(self, character):
+        dots = bytearray(self.empty_dots)
+        stream = bytearray()
+        layout = []
+        packed = set()
+        for field, value in character.items():
+            # The first attribute and skill sections go in the dots block
+            if ATTRIBUTES not in packed and self._pack_attributes(value, dots):
+                packed.add(ATTRIBUTES)
+                layout.append((field, ATTRIBUTES))
+            elif SKILLS not in packed and self._pack_skills(value, dots):
+                packed.add(SKILLS)
+                layout.append((field, SKILLS))
+            elif type(value) is str:
+                # Names and seed codes are mostly one of a kind, so top-level
+                # text is stored inline as UTF-8 instead of being interned
+                text = value.encode("utf-8")
+                layout.append((field, VALUE))
+                write_varint(stream, len(text) << 2 | TEXT)
+                stream += text
+            else:
+                layout.append((field, VALUE))
+                self._write(stream, value)
+        head = bytearray()
+        write_varint(head, self.intern(tuple(layout), self.layouts, self.layout_ids))
+        return CharacterRecord(self, bytes(dots + head + stream))
+
+    def _pack_attributes(self, value, dots):
+        # Only a full set of attributes, in ruleset order, goes in the dots
+        # block; anything else is stored as a plain value
+        if not isinstance(value, dict) or tuple(value) != self.attribute_names:
+            return False
+        row = list(value.values())
+        if not all(type(dots_) is int and 0 <= dots_ <= MAX_DOTS for dots_ in row):
+            return False
+        dots[:self.attribute_count] = bytes(row)
+        return True
+
+    def _pack_skills(self, value, dots):
+        # Skills above zero in ruleset order, the shape generate_skills
+        # gives; zeros are dropped again when unpacking
+        if not isinstance(value, dict) or not value:
+            return False
+        last = -1
+        for name, dots_ in value.items():
+            index = self.skill_indexes.get(name)
+            if index is None or index <= last or type(dots_) is not int or not 0 < dots_ <= MAX_DOTS:
+                return False
+            last = index
+        for name, dots_ in value.items():
+            dots[self.attribute_count + self.skill_indexes[name]] = dots_
+        return True
+
+    def _write(self, stream, value):
+        if isinstance(value, dict):
+            write_varint(stream, len(value) << 2 | DICT)
+            for key, item in value.items():
+                write_varint(stream, self.atom(key))
+                self._write(stream, item)
+        elif isinstance(value, list):
+            write_varint(stream, len(value) << 2 | LIST)
+            for item in value:
+                # A dict inside a list is a catalog entry and is interned whole
+                if isinstance(item, dict):
+                    write_varint(stream, self.atom(item) << 2 | ATOM)
+                else:
+                    self._write(stream, item)
+        else:
+            write_varint(stream, self.atom(value) << 2 | ATOM)
+
+    def _read(self, data, pos, build=True):
+        # (value, position after it); with build False the value is skipped
+        head, pos = read_varint(data, pos)
+        tag, count = head & 3, head >> 2
+        if tag == ATOM:
+            return (thaw(self.values[count]) if build else None), pos
+        if tag == TEXT:
+            return (str(data[pos:pos + count], "utf-8") if build else None), pos + count
+        if tag == LIST:
+            items = [] if build else None
+            for _ in range(count):
+                item, pos = self._read(data, pos, build)
+                if build:
+                    items.append(item)
+            return items, pos
+        items = {} if build else None
+        for _ in range(count):
+            key, pos = read_varint(data, pos)
+            item, pos = self._read(data, pos, build)
+            if build:
+                items[thaw(self.values[key])] = item
+        return items, pos
+
+    def decode(self, data, wanted=None):
+        # (field, value) pairs of a record in character order; with wanted,
+        # only that field is built and the ones before it are skipped over
+        start = len(self.empty_dots)
+        layout_id, pos = read_varint(data, start)
+        for field, kind in self.layouts[layout_id]:
+            build = wanted is None or field == wanted
+            if kind == ATTRIBUTES:
+                value = dict(zip(self.attribute_names, data[:self.attribute_count])) if build else None
+            elif kind == SKILLS:
+                value = {name: dots for name, dots in zip(self.skill_names, data[self.attribute_count:start])
+                         if dots} if build else None
+            else:
+                value, pos = self._read(data, pos, build)
+            if build:
+                yield field, value
+                if wanted is not None:
+                    return
+
+    def fields(self, data):
+        layout_id, _ = read_varint(data, len(self.empty_dots))
+        return self.layouts[layout_id]
+
+
+class CharacterRecord(Mapping):
+    # Read-only, compact stand-in for a generated character. It reads like
+    # the character dict it was made from: format_character, export and
+    # reroll take either. Each lookup builds a fresh copy of that section.
+    __slots__ = ("codec", "data")
+
+    def __init__(self, codec, data):
+        self.codec = codec
+        # Trait dots in ruleset order, then the layout ID and the ID stream
+        self.data = data
+
+    def __getitem__(self, field):
+        for _, value in self.codec.decode(self.data, field):
+            return value
+        raise KeyError(field)
+
+    def __iter__(self):
+        return (field for field, _ in self.codec.fields(self.data))
+
+    def __len__(self):
+        return len(self.codec.fields(self.data))
+
+    def __contains__(self, field):
+        return any(name == field for name, _ in self.codec.fields(self.data))
+
+    def items(self):
+        return self.to_dict().items()
+
+    def values(self):
+        return self.to_dict().values()
+
+    def to_dict(self):
+        return dict(self.codec.decode(self.data))
+
+    @property
+    def dots(self):
+        # Attribute then skill dots in ruleset order, zero where absent
+        return memoryview(self.data)[:len(self.codec.empty_dots)]
+
+    def __repr__(self):
+        return f"CharacterRecord({self.to_dict()!r})"
+
+    def __reduce__(self):
+        # IDs only mean something to the codec that issued them, so a record
+        # crosses processes as the plain character
+        return dict, (self.to_dict(),)
@@ -0,0 +1,84 @@
+import glob
+import hashlib
+import logging
+import os
+import pickle
+
+from npcgen.engine import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+RULESET_DIR = os.path.join(CACHE_DIR, "rulesets")
+# Bump when the snapshot layout changes
+VERSION = 1
+
+
+def source_key(engine):
+    # Everything a snapshot was compiled from: the JSON files, plus the
+    # package modules whose code derives and pickles tables from them
+    files = [os.path.join(engine.data_dir, filename) for filename in sorted(engine.data_files)]
+    files += sorted(glob.glob(os.path.join(PACKAGE_DIR, "*.py")))
+    key = [VERSION, type(engine).__qualname__]
+    for path in files:
+        stat = os.stat(path)
+        key.append((os.path.abspath(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(key)
+
+
+def snapshot_path(engine):
+    data_dir = hashlib.sha1(os.path.abspath(engine.data_dir).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(RULESET_DIR, f"{type(engine).__name__}-{data_dir}.pickle")
+
+
+def compile_ruleset(engine):
+    # Parse, derive and validate once, and keep whatever that set on the engine
+    before = set(vars(engine))
+    engine.parse_json_data()
+    return {attr: value for attr, value in vars(engine).items() if attr not in before}
+
+
+def load_ruleset(engine, path=None):
+    # Compiled tables for the engine, from the snapshot when it is still
+    # current and from the JSON files otherwise
+    path = path or snapshot_path(engine)
+    try:
+        key = source_key(engine)
+    except OSError as e:
+        # A missing data file is reported by the JSON loader
+        logger.debug(f"Not using ruleset snapshot: {e}")
+        return compile_ruleset(engine)
+
+    try:
+        with open(path, "rb") as f:
+            stored_key, tables = pickle.load(f)
+        if stored_key == key:
+            logger.debug(f"Loaded ruleset snapshot {path}")
+            return tables
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable ruleset snapshot {path}: {e}")
+
+    tables = compile_ruleset(engine)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write beside the target and swap it in, so workers starting at the
+        # same time never read a half-written snapshot
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump((key, tables), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        logger.info(f"Compiled ruleset snapshot {path}")
+    except OSError as e:
+        logger.warning(f"Could not write ruleset snapshot {path}: {e}")
+    return tables
+
+
+if __name__ == "__main__":
+    # Precompile every splat, e.g. while building a worker image
+    from npcgen.splats import SPLATS
+
+    logging.basicConfig(level=logging.INFO)
+    for engine_class, _ in SPLATS.values():
+        engine_class()
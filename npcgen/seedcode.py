@@ -0,0 +1,34 @@
+import base64
+import secrets
+import struct
+
+# Code layout before base32: format version, splat tag, the first four
+# bytes of the ruleset fingerprint and the 64-bit seed. The version is
+# bumped whenever the generators would roll a different character from
+# the same seed.
+VERSION = 2
+LAYOUT = struct.Struct(">B1s4sQ")
+
+
+def new_seed():
+    return secrets.randbits(64)
+
+
+def encode(tag, fingerprint, seed):
+    raw = LAYOUT.pack(VERSION, tag.encode("ascii"), bytes.fromhex(fingerprint)[:4], seed)
+    return base64.b32encode(raw).decode("ascii").rstrip("=")
+
+
+def decode(code):
+    # Returns (tag, fingerprint prefix, seed)
+    code = code.strip().upper()
+    try:
+        raw = base64.b32decode(code + "=" * (-len(code) % 8))
+        version, tag, fingerprint, seed = LAYOUT.unpack(raw)
+    except (ValueError, struct.error):
+        raise ValueError(f"Malformed seed code '{code}'")
+    if version < VERSION:
+        raise ValueError(f"Seed code {code} was made by an older version of the generator")
+    if version != VERSION:
+        raise ValueError(f"Unsupported seed code version {version}")
+    return tag.decode("ascii"), fingerprint.hex(), seed
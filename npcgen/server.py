@@ -0,0 +1,259 @@
+import argparse
+import dataclasses
+import json
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from npcgen.metrics import Metrics
+from npcgen.splats import SPLATS, Cast, parse_params
+
+logger = logging.getLogger(__name__)
+
+ROUTES = {f"/{splat}": classes for splat, classes in SPLATS.items()}
+
+# Most characters one request may ask for
+MAX_COUNT = 1000
+
+
+class Batcher:
+    # Funnels every request for one engine through a single thread. Requests
+    # that queue up while a batch is running are served together, and those
+    # with identical inputs share one generate_many call. An idle service
+    # starts on a request immediately; max_wait adds an optional pause to
+    # gather larger batches.
+    def __init__(self, engine, max_batch=256, max_wait=0.0):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"batcher-{engine.splat}", daemon=True)
+        self._thread.start()
+
+    def submit(self, params, count=1, seeded=False):
+        future = Future()
+        self._queue.put((params, count, seeded, future))
+        return future
+
+    def stop(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        total = first[1]
+        while total < self.max_batch:
+            try:
+                item = self._queue.get(timeout=self.max_wait) if self.max_wait else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Serve what was collected, then stop
+                self._queue.put(None)
+                break
+            batch.append(item)
+            total += item[1]
+        return batch
+
+    def _run(self):
+        while (batch := self._collect()) is not None:
+            try:
+                self._serve_batch(batch)
+            except Exception as e:
+                # A failure fails the requests still waiting on this batch,
+                # never the worker
+                logger.exception("Character batch failed")
+                for _, _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _serve_batch(self, batch):
+        groups = {}
+        for params, count, seeded, future in batch:
+            if seeded:
+                self._serve(future, lambda p=params, n=count: [self.engine.generate_seeded(p) for _ in range(n)])
+                continue
+            try:
+                key = dataclasses.astuple(params)
+                hash(key)
+            except TypeError as e:
+                future.set_exception(e)
+                continue
+            groups.setdefault(key, []).append((params, count, future))
+
+        for requests in groups.values():
+            params = requests[0][0]
+            total = sum(count for _, count, _ in requests)
+            try:
+                if total == 1:
+                    characters = [self.engine.generate(params)]
+                else:
+                    characters = self.engine.generate_many(total, params)
+            except Exception as e:
+                logger.exception("Character generation failed")
+                for _, _, future in requests:
+                    future.set_exception(e)
+                continue
+            start = 0
+            for _, count, future in requests:
+                future.set_result(characters[start:start + count])
+                start += count
+
+    @staticmethod
+    def _serve(future, generate):
+        try:
+            future.set_result(generate())
+        except Exception as e:
+            logger.exception("Character generation failed")
+            future.set_exception(e)
+
+
+class GenerationService:
+    # One cast of engines with their rulesets loaded once, sharing one
+    # rules core and one name provider
+    def __init__(self, name_backend="cache", max_batch=256, max_wait=0.0, timeout=30):
+        self.metrics = Metrics()
+        self.name_provider = self._name_provider(name_backend)
+        self.cast = Cast(self.name_provider, metrics=self.metrics)
+        self.timeout = timeout
+        self.batchers = {}
+        for splat, (_, params_class) in SPLATS.items():
+            self.batchers[f"/{splat}"] = (Batcher(self.cast.engine(splat), max_batch, max_wait), params_class)
+
+    @staticmethod
+    def _name_provider(backend):
+        if backend == "cache":
+            # Never hold a request on the API: cold cultures answer from the
+            # offline corpus while the prefetcher warms them up
+            from npcgen.namecache import NamePool
+            pool = NamePool(blocking=False)
+            pool.start()
+            return pool
+        return backend
+
+    def check(self, route, params):
+        # Raise ValueError for constraints no character with params can meet
+        engine = self.batchers[route][0].engine
+        engine.constraints_for(params, engine.tier(params.importance))
+
+    def generate(self, route, params, count=1, seeded=False):
+        batcher, _ = self.batchers[route]
+        return batcher.submit(params, count, seeded).result(self.timeout)
+
+    def close(self):
+        for batcher, _ in self.batchers.values():
+            batcher.stop()
+        if hasattr(self.name_provider, "close"):
+            self.name_provider.close()
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default listen backlog of 5 drops connections under a burst of
+    # clients, which then stall on a one second SYN retry
+    request_queue_size = 128
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    service = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/metrics":
+            self._send(200, self.service.metrics.openmetrics(), "application/openmetrics-text; version=1.0.0")
+            return
+        self._generate(url.path, dict(parse_qsl(url.query)))
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(body, dict):
+                raise ValueError("expected a JSON object")
+        except ValueError as e:
+            self._send_json(400, {"error": f"Invalid JSON body: {e}"})
+            return
+        body.update(parse_qsl(url.query))
+        self._generate(url.path, body)
+
+    def _generate(self, path, values):
+        if path not in ROUTES:
+            self._send_json(404, {"error": f"Unknown endpoint {path}", "endpoints": sorted(ROUTES) + ["/metrics"]})
+            return
+        try:
+            count = int(values.pop("count", 1))
+            if not 1 <= count <= MAX_COUNT:
+                raise ValueError(f"count must be between 1 and {MAX_COUNT}")
+            seeded = str(values.pop("seeded", "")).lower() in ("1", "true", "yes")
+            text = values.pop("format", "json") == "text"
+            params = parse_params(ROUTES[path][1], values)
+            self.service.check(path, params)
+        except (TypeError, ValueError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        try:
+            characters = self.service.generate(path, params, count, seeded)
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+
+        if text:
+            engine = self.service.batchers[path][0].engine
+            self._send(200, "\n".join(engine.format_character(c) for c in characters), "text/plain; charset=utf-8")
+        else:
+            self._send_json(200, {"characters": characters})
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload, ensure_ascii=False), "application/json")
+
+    def _send(self, status, body, content_type):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+def serve(host="127.0.0.1", port=8765, **service_options):
+    service = GenerationService(**service_options)
+    handler = type("Handler", (RequestHandler,), {"service": service})
+    server = Server((host, port), handler)
+    logger.info(f"Serving {', '.join(ROUTES)} on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m npcgen.server",
+                                     description="Serve NPC generation over local HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--names", default="cache", help="name backend: cache, offline or api")
+    parser.add_argument("--max-batch", type=int, default=256, help="most characters generated per batch")
+    parser.add_argument("--max-wait", type=float, default=0.0,
+                        help="seconds to wait for more requests before starting a batch")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    serve(args.host, args.port, name_backend=args.names, max_batch=args.max_batch, max_wait=args.max_wait)
+
+
+if __name__ == "__main__":
+    main()
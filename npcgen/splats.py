@@ -0,0 +1,112 @@
+import dataclasses
+import json
+import random
+
+import numpy as np
+
+from npcgen.garou import WerewolfEngine, WerewolfParams
+from npcgen.hunter import HunterEngine, HunterParams
+from npcgen.vampire import VampireEngine, VampireParams
+
+# Splat name -> (engine class, params class)
+SPLATS = {
+    engine_class.splat: (engine_class, params_class)
+    for engine_class, params_class in (
+        (VampireEngine, VampireParams),
+        (WerewolfEngine, WerewolfParams),
+        (HunterEngine, HunterParams),
+    )
+}
+
+# Params class -> splat name, for telling cast members apart
+PARAMS_SPLATS = {params_class: splat for splat, (_, params_class) in SPLATS.items()}
+
+
+def splat_of(params):
+    try:
+        return PARAMS_SPLATS[type(params)]
+    except KeyError:
+        raise ValueError(f"No splat takes {type(params).__name__}") from None
+
+
+def parse_params(params_class, values):
+    # Params from key -> value inputs (a query string, a JSON body or the
+    # export CLI), each checked against its field type; ValueError for
+    # anything else
+    fields = {field.name: field.type for field in dataclasses.fields(params_class)}
+    unknown = set(values) - set(fields)
+    if unknown:
+        raise ValueError(f"Unknown parameter(s): {', '.join(sorted(unknown))}; expected any of {', '.join(fields)}")
+    return params_class(**{key: param_value(fields[key], key, value) for key, value in values.items()})
+
+
+def param_value(kind, key, value):
+    # Tuples (skill_focus, constraints) may be lists of strings or comma
+    # separated strings; ints and bools may also come as query strings
+    if kind is tuple:
+        if isinstance(value, str):
+            value = [part.strip() for part in value.split(",") if part.strip()]
+        if isinstance(value, list) and all(isinstance(item, str) for item in value):
+            return tuple(value)
+    elif kind is bool:
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str):
+            return value.lower() in ("1", "true", "yes")
+    elif kind is int:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        if isinstance(value, str) and value.strip().lstrip("-").isdigit():
+            return int(value)
+    elif isinstance(value, kind):
+        return value
+    raise ValueError(f"Invalid value for {key}: {json.dumps(value)}")
+
+
+class Cast:
+    # Mixed casts from one process: one engine per splat, built on first use,
+    # all sharing one name provider and one rules core (see
+    # CharacterEngine.share_core)
+    def __init__(self, name_provider="offline", metrics=None, data_dirs=None, ruleset_cache=True):
+        if isinstance(name_provider, str):
+            from npcgen.names import name_provider as backend_provider
+            name_provider = backend_provider(name_provider)
+        self.name_provider = name_provider
+        self.metrics = metrics
+        # Splat -> data folder, for running against fixture rulesets
+        self.data_dirs = data_dirs or {}
+        self.ruleset_cache = ruleset_cache
+        self.engines = {}
+
+    def engine(self, splat):
+        if splat not in self.engines:
+            if splat not in SPLATS:
+                raise ValueError(f"Unknown splat '{splat}', expected one of {', '.join(SPLATS)}")
+            engine_class, _ = SPLATS[splat]
+            self.engines[splat] = engine_class(data_dir=self.data_dirs.get(splat), name_provider=self.name_provider,
+                                               ruleset_cache=self.ruleset_cache, metrics=self.metrics)
+        return self.engines[splat]
+
+    def generate_one(self, params, rng=random):
+        return self.engine(splat_of(params)).generate(params, rng=rng)
+
+    def format_character(self, params, character):
+        return self.engine(splat_of(params)).format_character(character)
+
+    def generate(self, roster, seed=None):
+        # One character per params object in roster, in roster order. Members
+        # with identical inputs are generated together by generate_many; a
+        # seed makes the whole cast reproducible.
+        roster = list(roster)
+        groups = {}
+        for index, params in enumerate(roster):
+            key = (splat_of(params), dataclasses.astuple(params))
+            groups.setdefault(key, []).append(index)
+
+        seeds = [None] * len(groups) if seed is None else np.random.SeedSequence(seed).spawn(len(groups))
+        characters = [None] * len(roster)
+        for ((splat, _), indices), group_seed in zip(groups.items(), seeds):
+            batch = self.engine(splat).generate_many(len(indices), roster[indices[0]], seed=group_seed)
+            for index, character in zip(indices, batch):
+                characters[index] = character
+        return characters
@@ -0,0 +1,474 @@
+import logging
+import random
+from dataclasses import dataclass
+
+import numpy as np
+
+from npcgen.constraints import ADVANTAGE, DISCIPLINE, FLAW
+from npcgen.engine import ALL_FOCUSES, CharacterEngine
+
+logger = logging.getLogger(__name__)
+
+ADVANTAGES = ("Allies", "Contacts", "Fame", "Herd", "Influence", "Resources", "Status")
+FLAWS = ("Addiction", "Enemy", "Haunted", "Hunted", "Infamous", "Indebted", "Suspect")
+# Sects that grant their own status advantage
+STATUS_SECTS = frozenset(("Camarilla", "Anarchs", "Autarkis", "Sabbat", "Hecata", "Black Hand", "Ashirra"))
+# Highest level a discipline reaches, and the highest advantage and flaw dots
+MAX_LEVEL = 5
+MAX_ADVANTAGE = 5
+MAX_FLAW = 3
+# Discipline plan of a clan missing from the clan data; None is a random pick
+RANDOM_PLAN = (None, None, None)
+
+
+@dataclass
+class VampireParams:
+    clan: str = ""
+    generation: int = 13
+    sect: str = ""
+    diablerist: bool = False
+    importance: str = ""
+    skill_focus: tuple = ALL_FOCUSES
+    culture: str = ""
+    # Constraint specs such as "Stealth>=4", "Resources" or "!Brawl"
+    constraints: tuple = ()
+
+    def __post_init__(self):
+        # Default to all focuses if none selected
+        self.skill_focus = tuple(self.skill_focus) or ALL_FOCUSES
+        self.constraints = tuple(self.constraints)
+
+
+class VampireEngine(CharacterEngine):
+    data_folder = "Vampires"
+    splat = "vampire"
+    seed_tag = "V"
+    importance_levels = ("Thug", "Minor", "Important", "Boss", "Big Bad", "Ancient", "Mythical", "Legendary")
+    attribute_points = {
+        "Thug": 12, "Minor": 15, "Important": 18, "Boss": 21,
+        "Big Bad": 24, "Ancient": 27, "Mythical": 30
+    }
+    skill_points = {
+        "Thug": 20, "Minor": 25, "Important": 30, "Boss": 35,
+        "Big Bad": 40, "Legendary": 45
+    }
+    importance_values = {
+        "blood_potency_bonus": ({
+            "Thug": 0, "Minor": 1, "Important": 2, "Boss": 3,
+            "Big Bad": 4, "Ancient": 5, "Mythical": 6
+        }, 0),
+        "discipline_points": ({
+            "Thug": 4, "Minor": 5, "Important": 6, "Boss": 7,
+            "Big Bad": 8, "Ancient": 9, "Mythical": 10
+        }, 4),
+        "base_humanity": ({
+            "Thug": 7, "Minor": 6, "Important": 5, "Boss": 4,
+            "Big Bad": 3, "Ancient": 2, "Mythical": 1
+        }, 6),
+        "advantage_count": ({
+            "Thug": 1, "Minor": 2, "Important": 3, "Boss": 4,
+            "Big Bad": 5, "Ancient": 6, "Mythical": 7
+        }, 2),
+        "flaw_count": ({
+            "Thug": 3, "Minor": 2, "Important": 2, "Boss": 1,
+            "Big Bad": 1, "Ancient": 1, "Mythical": 0
+        }, 2),
+    }
+    sections = {
+        "Name": ("name", lambda self, params, tier, rng: self.generate_name(params.culture, rng=rng)),
+        "Blood Potency": ("blood_potency",
+            lambda self, params, tier, rng: self.calculate_blood_potency(params.generation, tier)),
+        "Attributes": ("attributes", lambda self, params, tier, rng: self.generate_attributes(
+            params.skill_focus, tier, rng=rng, constraints=self.constraints_for(params, tier))),
+        "Skills": ("skills", lambda self, params, tier, rng: self.generate_skills(
+            params.skill_focus, tier, rng=rng, constraints=self.constraints_for(params, tier))),
+        "Disciplines": ("disciplines", lambda self, params, tier, rng: self.generate_disciplines(
+            params.clan, params.diablerist, tier, rng=rng, constraints=self.constraints_for(params, tier))),
+        "Humanity": ("humanity", lambda self, params, tier, rng: self.generate_humanity(tier)),
+        "Advantages": ("advantages", lambda self, params, tier, rng: self.generate_advantages(
+            params.sect, tier, rng=rng, constraints=self.constraints_for(params, tier))),
+        "Flaws": ("flaws", lambda self, params, tier, rng: self.generate_flaws(
+            tier, rng=rng, constraints=self.constraints_for(params, tier))),
+    }
+    constraint_fields = ("clan", "diablerist")
+    distinct_sections = {
+        "Skills": frozenset,
+        "Disciplines": frozenset,
+        "Advantages": frozenset,
+        "Flaws": frozenset,
+    }
+    data_files = {
+        "5eAttributes.json": "attributes_data",
+        "5eSkills.json": "skills_data",
+        "5eDisciplines.json": "disciplines_data",
+        "5eClanDiscs.json": "clan_disciplines_data",
+    }
+
+    # Validate before loading json values
+    def validate_json_data(self):
+        if "Disciplines" not in self.disciplines_data:
+            raise KeyError("'Disciplines' key not found in disciplines data")
+        for discipline, data in self.disciplines_data["Disciplines"].items():
+            if "skills" not in data:
+                raise KeyError(f"'skills' key not found for discipline {discipline}")
+        if "clans" not in self.clan_disciplines_data:
+            raise KeyError("'clans' key not found in clan disciplines data")
+
+    def build_tables(self):
+        disciplines = self.disciplines_data["Disciplines"]
+        self.discipline_names = list(disciplines)
+        # Discipline -> one tuple of powers to pick from per level
+        self.discipline_powers = {name: tuple(tuple(powers) for powers in data["skills"])
+                                  for name, data in disciplines.items()}
+        # Clan -> its disciplines in order, None standing for each "Random"
+        self.clan_plans = {
+            clan: tuple(None if name.startswith("Random") else name for name in data["disciplines"])
+            for clan, data in self.clan_disciplines_data["clans"].items() if data.get("disciplines")
+        }
+
+        # The same as flat arrays for batch_disciplines: one column per
+        # discipline, then any that a clan names but the discipline data
+        # lacks, and every power in one tuple sliced by level
+        columns = self.discipline_names + sorted({name for plan in self.clan_plans.values() for name in plan
+                                                  if name is not None and name not in disciplines})
+        self.discipline_columns = {name: i for i, name in enumerate(columns)}
+        self.discipline_names_by_column = tuple(columns)
+        self.power_start = np.zeros((len(columns), MAX_LEVEL), dtype=np.int64)
+        self.power_count = np.zeros((len(columns), MAX_LEVEL), dtype=np.int64)
+        # Levels a discipline lists, and how many lead up before an empty one
+        self.power_levels = np.zeros(len(columns), dtype=np.int64)
+        self.power_depth = np.zeros(len(columns), dtype=np.int64)
+        power_names = []
+        for column, name in enumerate(self.discipline_names):
+            levels = self.discipline_powers[name][:MAX_LEVEL]
+            self.power_levels[column] = len(levels)
+            self.power_depth[column] = next((i for i, powers in enumerate(levels) if not powers), len(levels))
+            for level, powers in enumerate(levels):
+                self.power_start[column, level] = len(power_names)
+                self.power_count[column, level] = len(powers)
+                power_names.extend(powers)
+        self.power_names = tuple(power_names)
+
+        self.spread_options = {
+            "clan": list(self.clan_disciplines_data["clans"]),
+            "sect": sorted(STATUS_SECTS),
+        }
+
+    def constraint_targets(self):
+        targets = super().constraint_targets()
+        targets.update((name, (DISCIPLINE, MAX_LEVEL)) for name in self.discipline_names_by_column)
+        targets.update((name, (ADVANTAGE, MAX_ADVANTAGE)) for name in ADVANTAGES)
+        targets.update((name, (FLAW, MAX_FLAW)) for name in FLAWS)
+        return targets
+
+    def check_constraints(self, constraints, params, tier):
+        super().check_constraints(constraints, params, tier)
+        importance = params.importance or "the default importance"
+        disciplines = constraints.required(DISCIPLINE)
+        needed = sum(disciplines.values())
+        if needed > self.discipline_points[tier]:
+            raise ValueError(f"Discipline minimums need {needed} points but {importance} only has "
+                             f"{self.discipline_points[tier]}")
+        # Disciplines outside the clan's own need a Random slot or diablerie
+        plan = self.clan_plans.get(params.clan, RANDOM_PLAN)
+        outside = [name for name in disciplines if name not in plan]
+        slots = plan.count(None) + params.diablerist
+        if len(outside) > slots:
+            raise ValueError(f"{params.clan or 'A vampire without a clan'} has room for {slots} disciplines outside "
+                             f"the clan's own, not {len(outside)}: {', '.join(outside)}")
+        for kind, label, count in ((ADVANTAGE, "advantages", self.advantage_count[tier]),
+                                   (FLAW, "flaws", self.flaw_count[tier])):
+            if len(constraints.required(kind)) > count:
+                raise ValueError(f"{importance} has {count} {label}, fewer than the "
+                                 f"{len(constraints.required(kind))} required")
+
+    def generate(self, params, attributes=None, skills=None, rng=random, name=None, disciplines=None):
+        tier = self.tier(params.importance)
+        constraints = self.constraints_for(params, tier)
+        with self.stage("total"):
+            with self.stage("name"):
+                if name is None:
+                    name = self.generate_name(params.culture, rng=rng)
+
+            character = {
+                "Name": name,
+                "Generation": params.generation,
+                "Clan": params.clan,
+                "Sect": params.sect
+            }
+
+            character["Blood Potency"] = self.calculate_blood_potency(params.generation, tier)
+
+            with self.stage("attributes"):
+                if attributes is None:
+                    attributes = self.generate_attributes(params.skill_focus, tier, rng=rng, constraints=constraints)
+                character["Attributes"] = attributes
+
+            with self.stage("skills"):
+                if skills is None:
+                    skills = self.generate_skills(params.skill_focus, tier, rng=rng, constraints=constraints)
+                character["Skills"] = skills
+
+            with self.stage("disciplines"):
+                if disciplines is None:
+                    disciplines = self.generate_disciplines(params.clan, params.diablerist, tier, rng=rng,
+                                                            constraints=constraints)
+                character["Disciplines"] = disciplines
+
+            character["Humanity"] = self.generate_humanity(tier)
+
+            with self.stage("advantages"):
+                character["Advantages"] = self.generate_advantages(params.sect, tier, rng=rng, constraints=constraints)
+
+            with self.stage("flaws"):
+                character["Flaws"] = self.generate_flaws(tier, rng=rng, constraints=constraints)
+
+        logger.debug(f"Generated character {name}")
+        return character
+
+    def calculate_blood_potency(self, generation, importance):
+        base_potency = max(1, 16 - generation)
+        return min(10, base_potency + self.blood_potency_bonus[self.tier(importance)])
+
+    def generate_disciplines(self, clan, diablerist, importance, rng=random, constraints=None):
+        clan_disciplines = self.clan_plans.get(clan)
+        if clan_disciplines is None:
+            logger.error(f"Clan {clan} not found in clan disciplines data or has no disciplines")
+            clan_disciplines = RANDOM_PLAN
+
+        total_points = self.discipline_points[self.tier(importance)]
+
+        disciplines = {}
+
+        all_disciplines = self.discipline_names
+
+        # Required disciplines not taken yet -> their minimum level. Those
+        # points are held back from every other draw, so a required
+        # discipline can always be taken at its minimum.
+        pending = {}
+        excluded = ()
+        if constraints is not None:
+            pending = dict(constraints.required(DISCIPLINE))
+            excluded = constraints.excluded(DISCIPLINE)
+            all_disciplines = [d for d in all_disciplines if d not in excluded]
+
+        # Prioritize clan disciplines
+        for slot, disc in enumerate(clan_disciplines):
+            if total_points <= 0:
+                break
+            if disc is None:
+                pool = all_disciplines
+                if pending:
+                    # Once the open slots left are only just enough for the
+                    # required disciplines outside the plan, they go to those
+                    unplaced = [d for d in pending if d not in clan_disciplines[slot + 1:]]
+                    if len(unplaced) >= clan_disciplines[slot:].count(None) + diablerist:
+                        pool = unplaced
+                disc = rng.choice(pool)
+
+            if disc not in disciplines and disc not in excluded:
+                floor = pending.pop(disc, 1)
+                free = total_points - sum(pending.values())
+                if free < floor:
+                    continue
+                level = min(MAX_LEVEL, max(floor, rng.randint(1, free)))
+                disciplines[disc] = {
+                    "level": level,
+                    "skills": self.get_discipline_skills(disc, level, rng=rng)
+                }
+                total_points -= level
+
+        # If diablerist, add a random non-clan discipline
+        if diablerist and total_points > 0:
+            rare_disciplines = list(pending) or [d for d in all_disciplines if d not in disciplines]
+            if rare_disciplines:
+                extra_disc = rng.choice(rare_disciplines)
+                floor = pending.pop(extra_disc, 1)
+                level = max(floor, min(3, total_points - sum(pending.values())))
+                disciplines[extra_disc] = {
+                    "level": level,
+                    "skills": self.get_discipline_skills(extra_disc, level, rng=rng)
+                }
+                total_points -= level
+
+        # If points remain, distribute among existing disciplines. Maxed
+        # disciplines leave the draw, so every draw spends a point.
+        open_disciplines = [d for d, details in disciplines.items() if details["level"] < MAX_LEVEL]
+        while total_points > 0 and open_disciplines:
+            i = rng.randrange(len(open_disciplines))
+            details = disciplines[open_disciplines[i]]
+            details["level"] += 1
+            total_points -= 1
+            if details["level"] >= MAX_LEVEL:
+                open_disciplines.pop(i)
+        if total_points > 0:
+            logger.warning(f"Every discipline is at level 5; {total_points} discipline points left unspent")
+
+        return disciplines
+
+    def get_discipline_skills(self, discipline, level, rng=random):
+        powers = self.discipline_powers.get(discipline)
+        if powers is None:
+            logger.error(f"Discipline {discipline} not found in disciplines data")
+            return []
+        try:
+            return [rng.choice(choices) for choices in powers[:level]]
+        except IndexError:
+            logger.error(f"Not enough skill levels for discipline {discipline}")
+            return []
+
+    def batch_sections(self, members, tier, rng=None):
+        # Disciplines for the whole batch, one batch_disciplines call per
+        # clan and diablerie among the members. Discipline constraints are
+        # met by generate_disciplines, one vampire at a time.
+        constraints = self.constraints_for(members[0], tier)
+        if constraints is not None and (constraints.required(DISCIPLINE) or constraints.excluded(DISCIPLINE)):
+            return {}
+        groups = {}
+        for i, member in enumerate(members):
+            groups.setdefault((member.clan, member.diablerist), []).append(i)
+        disciplines = [None] * len(members)
+        with self.stage("batch_disciplines"):
+            for (clan, diablerist), indexes in groups.items():
+                for i, drawn in zip(indexes, self.batch_disciplines(len(indexes), clan, diablerist, tier, rng=rng)):
+                    disciplines[i] = drawn
+        return {"disciplines": disciplines}
+
+    def batch_disciplines(self, n, clan, diablerist, importance, rng=None):
+        # generate_disciplines for n vampires of one clan at once. Levels are
+        # spent as an (n, disciplines) matrix, one plan slot at a time, and
+        # then every power of the batch is drawn in a single call.
+        rng = rng or np.random.default_rng()
+        plan = self.clan_plans.get(clan)
+        if plan is None:
+            logger.error(f"Clan {clan} not found in clan disciplines data or has no disciplines")
+            plan = RANDOM_PLAN
+        known = len(self.discipline_names)
+        rows = np.arange(n)
+        levels = np.zeros((n, len(self.discipline_columns)), dtype=np.int64)
+        # Each vampire's disciplines in the order they were taken, -1 for
+        # none, and the level each was taken at, which sets its powers
+        order = np.full((n, len(plan) + 1), -1, dtype=np.int64)
+        first_levels = np.zeros_like(order)
+        remaining = np.full(n, self.discipline_points[self.tier(importance)], dtype=np.int64)
+
+        # Prioritize clan disciplines
+        for slot, disc in enumerate(plan):
+            picks = rng.integers(known, size=n) if disc is None else np.full(n, self.discipline_columns[disc])
+            take = (remaining > 0) & (levels[rows, picks] == 0)
+            level = np.minimum(MAX_LEVEL, rng.integers(1, np.maximum(remaining, 1), endpoint=True)) * take
+            levels[rows, picks] += level
+            order[take, slot] = picks[take]
+            first_levels[:, slot] = level
+            remaining -= level
+
+        # If diablerist, add a random non-clan discipline
+        if diablerist:
+            rare = levels[:, :known] == 0
+            take = (remaining > 0) & rare.any(axis=1)
+            picks = self._kth_true(rare, rng.random(n))
+            level = np.minimum(3, remaining) * take
+            levels[rows, picks] += level
+            order[take, len(plan)] = picks[take]
+            first_levels[:, len(plan)] = level
+            remaining -= level
+
+        # If points remain, raise a random discipline below level 5 a dot at a time
+        while True:
+            open_disciplines = (levels > 0) & (levels < MAX_LEVEL)
+            take = (remaining > 0) & open_disciplines.any(axis=1)
+            if not take.any():
+                break
+            picks = self._kth_true(open_disciplines, rng.random(n))
+            levels[rows[take], picks[take]] += 1
+            remaining -= take
+        if remaining.any():
+            logger.warning(f"Every discipline is at level 5; {int(remaining.sum())} discipline points left unspent "
+                           f"across {int(np.count_nonzero(remaining))} vampires")
+
+        # One power per level each discipline was taken at, all drawn at once
+        taken = order >= 0
+        columns = order[taken]
+        taken_levels = levels[np.nonzero(taken)[0], columns]
+        depth = np.minimum(first_levels[taken], self.power_levels[columns])
+        broken = (columns >= known) | (self.power_depth[columns] < depth)
+        for column in np.unique(columns[broken]).tolist():
+            if column >= known:
+                logger.error(f"Discipline {self.discipline_names_by_column[column]} not found in disciplines data")
+            else:
+                logger.error(f"Not enough skill levels for discipline {self.discipline_names[column]}")
+        depth[broken] = 0
+        entries = np.repeat(np.arange(len(columns)), depth)
+        power_levels = np.arange(len(entries)) - np.repeat(np.cumsum(depth) - depth, depth)
+        power_columns = columns[entries]
+        counts = self.power_count[power_columns, power_levels]
+        picks = self.power_start[power_columns, power_levels] + (rng.random(len(entries)) * counts).astype(np.int64)
+        powers = [self.power_names[i] for i in picks.tolist()]
+
+        names = self.discipline_names_by_column
+        characters = []
+        entry = start = 0
+        depth = depth.tolist()
+        taken_levels = taken_levels.tolist()
+        for row in order.tolist():
+            disciplines = {}
+            for column in row:
+                if column < 0:
+                    continue
+                end = start + depth[entry]
+                disciplines[names[column]] = {"level": taken_levels[entry], "skills": powers[start:end]}
+                entry += 1
+                start = end
+            characters.append(disciplines)
+        return characters
+
+    @staticmethod
+    def _kth_true(mask, fractions):
+        # Column of a uniformly drawn True in each row of mask, given one
+        # uniform [0, 1) draw per row; rows without any give column 0
+        counts = mask.sum(axis=1)
+        k = (fractions * counts).astype(np.int64)
+        return np.minimum((np.cumsum(mask, axis=1) <= k[:, None]).sum(axis=1), mask.shape[1] - 1) * (counts > 0)
+
+    def generate_humanity(self, importance):
+        return self.base_humanity[self.tier(importance)]
+
+    def generate_advantages(self, sect, importance, rng=random, constraints=None):
+        advantages = self.rated_picks(ADVANTAGES, self.advantage_count[self.tier(importance)], MAX_ADVANTAGE,
+                                      ADVANTAGE, constraints, rng)
+
+        # Add sect-specific advantage
+        if sect in STATUS_SECTS:
+            advantages[f"{sect} Status"] = rng.randint(1, 3)
+
+        return advantages
+
+    def generate_flaws(self, importance, rng=random, constraints=None):
+        return self.rated_picks(FLAWS, self.flaw_count[self.tier(importance)], MAX_FLAW, FLAW, constraints, rng)
+
+    @staticmethod
+    def rated_picks(names, count, highest, kind, constraints, rng):
+        # count random names, each with 1 to highest dots; a name drawn twice
+        # keeps its last dots. Required names come first, at their minimum
+        # or above, and the draws skip required and excluded names.
+        picks = {}
+        if constraints is not None:
+            for name, minimum in constraints.required(kind).items():
+                picks[name] = rng.randint(minimum, highest)
+            count -= len(picks)
+            excluded = constraints.excluded(kind)
+            names = [name for name in names if name not in picks and name not in excluded]
+        for _ in range(count if names else 0):
+            name = rng.choice(names)
+            picks[name] = rng.randint(1, highest)
+        return picks
+
+    def format_section(self, key, value, lines):
+        if key == "Disciplines":
+            lines.append(f"{key}:\n")
+            for disc, details in value.items():
+                lines.append(f"  {disc} (Level {details['level']}):\n")
+                for skill in details['skills']:
+                    lines.append(f"    - {skill}\n")
+        else:
+            super().format_section(key, value, lines)
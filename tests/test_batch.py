@@ -0,0 +1,45 @@
+import logging
+
+import pytest
+
+from npcgen.garou import WerewolfEngine, WerewolfParams
+from npcgen.hunter import HunterEngine, HunterParams
+from npcgen.vampire import VampireEngine, VampireParams
+
+logging.disable(logging.CRITICAL)
+
+SPLATS = [(VampireEngine, VampireParams), (WerewolfEngine, WerewolfParams), (HunterEngine, HunterParams)]
+
+
+def stub_name(culture):
+    return "Stub Name"
+
+
+@pytest.fixture(scope="module", params=SPLATS, ids=lambda splat: splat[0].splat)
+def splat(request):
+    engine_class, params_class = request.param
+    return engine_class(name_provider=stub_name), params_class
+
+
+@pytest.mark.parametrize("seed", [None, 1])
+def test_generate_many_zero(splat, seed):
+    engine, params_class = splat
+    assert engine.generate_many(0, params_class(), seed=seed) == []
+    assert list(engine.iter_many(0, params_class(), seed=seed)) == []
+
+
+def test_generate_many(splat):
+    engine, params_class = splat
+    characters = engine.generate_many(3, params_class(), seed=1)
+    assert len(characters) == 3
+    assert characters == engine.generate_many(3, params_class(), seed=1)
+
+
+def test_generate_group_empty(splat):
+    engine, params_class = splat
+    field = next(iter(engine.spread_options))
+    assert engine.generate_group(0, params_class(), seed=1, spread=field, distinct="Skills") == []
+    with pytest.raises(ValueError):
+        engine.generate_group(-1, params_class())
+    with pytest.raises(ValueError):
+        engine.generate_group(2, params_class(), spread={field: []})